@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Measures peak memory of the split -> chat -> write pipeline on synthetic
+transcripts of increasing size.
+
+Each size runs in a fresh subprocess so that its peak RSS is not shared
+with the other runs. The chat model is replaced by a fake that streams a
+response proportional to its request, capped at the model's 4096 output
+tokens, so no network access or API key is needed.
+
+With --eager, the pipeline is run the way it was before it streamed: the
+transcript is split into a list of chunks up front and every output is
+collected before it is written.
+
+    python benchmarks/streaming_memory.py --mib 5 10 20
+    python benchmarks/streaming_memory.py --mib 5 10 20 --eager
+"""
+import argparse
+import io
+import os
+import resource
+import subprocess
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CHARS_PER_TOKEN = 4
+MAX_OUTPUT_TOKENS = 4096
+
+
+def synthetic_transcript(mib: float) -> str:
+    """Builds a transcript of roughly the given size in MiB."""
+    vocabulary = [f"word{i}" for i in range(5000)]
+    words = int(mib * 2**20 / 9)
+    return " ".join(vocabulary[i * 7919 % len(vocabulary)] for i in range(words))
+
+
+def fake_chat(model=None, temperature=0.0, messages=None, timeout=None):
+    """Streams a response of half the request's length, like a draft."""
+    request = len(messages[-1].content) // CHARS_PER_TOKEN
+    tokens = min(MAX_OUTPUT_TOKENS, request // 2)
+    return (f"tok{i % 10} " for i in range(tokens))
+
+
+class ApproximateEncoding:
+    """Approximates the tiktoken encoding offline at four characters per token."""
+
+    def encode_ordinary(self, text: str) -> range:
+        return range(max(1, len(text) // CHARS_PER_TOKEN))
+
+
+def run(mib: float, eager: bool) -> None:
+    """Runs the pipeline once and prints its memory statistics."""
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    import src.chunking
+    from src.ai import AI
+    from src.transcript import Metadata, Transcript
+
+    src.chunking._encoding = ApproximateEncoding
+    AI._chat = staticmethod(fake_chat)
+
+    transcript = Transcript(
+        content=synthetic_transcript(mib),
+        metadata=Metadata(
+            title="Benchmark",
+            publish_date="2024-01-01",
+            author="Benchmark",
+            url="https://www.youtube.com/watch?v=benchmark",
+        ),
+    )
+    ai = AI(transcript)
+
+    tracemalloc.start()
+    if eager:
+        chunks = ai._split_transcript()
+        ai._iter_transcript = lambda chunk_size=10000: iter(chunks)
+        sink = io.StringIO()
+        sink.write("".join(["".join(ai.summary()), "".join(ai.takeaways())]))
+    else:
+        with open(os.devnull, "w") as sink:
+            for piece in ai.stream_summary():
+                sink.write(piece)
+            for piece in ai.stream_takeaways():
+                sink.write(piece)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss //= 1024
+    print(
+        f"{len(transcript.content) / 2**20:.1f}\t{peak / 2**20:.1f}\t{rss / 1024:.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mib", type=float, nargs="+", default=[5, 10, 20])
+    parser.add_argument(
+        "--eager",
+        action="store_true",
+        help="split into a list and collect every output, for comparison",
+    )
+    parser.add_argument("--child", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        run(args.child, args.eager)
+        return
+
+    print("transcript MiB\tpipeline peak MiB\tprocess RSS MiB")
+    for mib in args.mib:
+        command = [sys.executable, __file__, "--child", str(mib)]
+        if args.eager:
+            command.append("--eager")
+        subprocess.run(command, check=True)
+
+
+if __name__ == "__main__":
+    main()
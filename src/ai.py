@@ -1,10 +1,21 @@
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator
 
-from langchain.text_splitter import CharacterTextSplitter
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 
+from src.cache import ResultCache
+from src.chunking import (
+    CHUNKER_VERSION,
+    count_tokens,
+    group_sizes,
+    iter_content_chunks,
+)
 from src.exceptions import InvalidTranscript
+from src.hedging import Hedger
+from src.index import VectorIndex
 from src.transcript import Transcript
 
 
@@ -15,12 +26,47 @@ class AI:
     on the conversation.
     """
 
-    def __init__(self, transcript: Transcript) -> None:
+    ASK_CHUNK_SIZE = 1000
+    MERGE_CONTEXT_SIZE = 12000
+    # A losing hedge cannot be interrupted while it waits for a token, so
+    # hedged requests are always bounded, rather than by the client's
+    # default timeout of ten minutes.
+    HEDGED_REQUEST_TIMEOUT = 120.0
+
+    def __init__(
+        self,
+        transcript: Transcript,
+        fan_in: int = 4,
+        max_workers: int = 4,
+        hedger: Hedger = None,
+        request_timeout: float = None,
+        deadline: float = None,
+        cache: ResultCache = None,
+        deadline_at: float = None,
+    ) -> None:
         """Initializes an instance of the AI class.
 
         Args:
             transcript (Transcript): The transcript object containing
                 the content and metadata.
+            fan_in (int): The maximum number of drafts merged by a single
+                request when combining per-chunk summaries. Defaults to 4.
+            max_workers (int): The maximum number of merge requests run in
+                parallel. Defaults to 4.
+            hedger (Hedger): Issues duplicate requests for chunks that are
+                slow to start. Defaults to None, which never hedges.
+            request_timeout (float): The number of seconds after which a
+                single request is abandoned. Defaults to None.
+            deadline (float): The number of seconds after which the run
+                stops and returns the output of the chunks completed so far.
+                Defaults to None.
+            cache (ResultCache): Stores the response for each transcript
+                chunk, so unchanged chunks are not requested again.
+                Defaults to None, which disables caching.
+            deadline_at (float): The time.monotonic() time at which the run
+                stops, so that many AI instances can share one run deadline.
+                Defaults to None. The earlier of deadline and deadline_at
+                applies.
 
         Raises:
             KeyError: If the OPENAI_API_KEY environment variable is not set.
@@ -30,6 +76,23 @@ class AI:
         """
         self.transcript = transcript.content
         self.metadata = transcript.metadata
+        self.fan_in = fan_in
+        self.max_workers = max_workers
+        self.hedger = hedger or Hedger(hedge=False)
+        self.request_timeout = request_timeout
+        if deadline is not None:
+            relative = time.monotonic() + deadline
+            deadline_at = (
+                relative if deadline_at is None else min(relative, deadline_at)
+            )
+        self.deadline_at = deadline_at
+        self.truncated = False
+        self.cache = cache
+
+        if fan_in < 2:
+            raise ValueError("fan_in must be at least 2.")
+        if max_workers < 1:
+            raise ValueError("max_workers must be positive.")
 
         if self.transcript is None or self.transcript == "":
             raise InvalidTranscript()
@@ -43,55 +106,318 @@ class AI:
         Returns:
             list: A list of key takeaways.
         """
-        output = []
-        for transcript in self._split_transcript():
-            messages = [
-                SystemMessage(
-                    content=(
-                        "The user will provide a transcript."
-                        "From the transcript, you will provide a bulleted list of "
-                        "key takeaways. At the top of the list, add a title: "
-                        f"'# Key Takeaways — {self.metadata.title}'"
-                    )
-                ),
-                HumanMessage(content=self.transcript),
-            ]
-            output.append("".join(self._chat(temperature=1.0, messages=messages)))
-
-        return output
+        return ["".join(tokens) for tokens in self._map(self._takeaways_messages)]
+
+    def stream_takeaways(self) -> Iterator[str]:
+        """Streams the key takeaways token by token as they are generated,
+        processing one transcript chunk at a time.
+
+        Yields:
+            str: The next piece of generated text.
+        """
+        for tokens in self._map(self._takeaways_messages):
+            yield from tokens
 
     def summary(self) -> list:
         """Generates a summary of the transcript by reformatting it into an
         in-depth markdown blog post using sections and section headers.
 
+        Long transcripts are drafted chunk by chunk, and the drafts are then
+        merged into a single article (see _reduce).
+
         Returns:
             A list of strings representing the generated summary.
         """
-        output = []
+        return ["".join(self.stream_summary())]
+
+    def stream_summary(self) -> Iterator[str]:
+        """Streams the summary token by token as it is generated.
+
+        The per-chunk drafts and intermediate merges are produced first;
+        only the final merge is streamed.
+
+        Yields:
+            str: The next piece of generated text.
+        """
+        yield from self.merge_summaries(
+            ["".join(tokens) for tokens in self._map(self._summary_messages)]
+        )
+
+    def summarize_chunk(self, transcript: str) -> str:
+        """Drafts the blog post form of a single transcript chunk, so that
+        chunks can be scheduled independently (see merge_summaries).
+
+        Args:
+            transcript (str): The transcript chunk.
+
+        Returns:
+            str: The draft, or None if it timed out or the run deadline
+                has passed.
+        """
+        return self._complete(self._summary_messages(transcript))
 
-        for transcript in self._split_transcript():
-            messages = [
-                SystemMessage(
-                    content=(
-                        "The user will provide a transcript."
-                        "reformat the transcript  into an in-depth "
-                        "markdown blog post using sections and section headers."
-                        f"The title of the blog post will be {self.metadata.title}."
-                    )
-                ),
-                HumanMessage(content=transcript),
-            ]
+    def extract_takeaways(self, transcript: str) -> str:
+        """Lists the key takeaways of a single transcript chunk.
 
-            output.append("".join(self._chat(temperature=1.0, messages=messages)))
+        Args:
+            transcript (str): The transcript chunk.
 
-        return output
+        Returns:
+            str: The takeaways, or None if they timed out or the run
+                deadline has passed.
+        """
+        return self._complete(self._takeaways_messages(transcript))
+
+    def merge_summaries(self, drafts: list) -> Iterator[str]:
+        """Merges per-chunk drafts into a single article.
+
+        The drafts are reduced level by level (see _reduce) and only the
+        final merge is streamed. Drafts whose merge timed out are joined
+        as they are.
+
+        Args:
+            drafts (list): The per-chunk drafts, in transcript order. Drafts
+                that are None are skipped.
+
+        Yields:
+            str: The next piece of the article.
+        """
+        drafts = self._reduce([draft for draft in drafts if draft is not None])
+        if len(drafts) > 1 and not self._expired():
+            try:
+                yield from self._request(self._merge_messages(drafts))
+                return
+            except TimeoutError:
+                self.truncated = True
+        yield "\n\n".join(drafts)
+
+    def _takeaways_messages(self, transcript: str) -> list:
+        """Builds the messages asking for the key takeaways of a chunk."""
+        return takeaways_messages(self.metadata.title, transcript)
+
+    def _summary_messages(self, transcript: str) -> list:
+        """Builds the messages asking for a blog post form of a chunk."""
+        return summary_messages(self.metadata.title, transcript)
+
+    def _merge_messages(self, drafts: list) -> list:
+        """Builds the messages asking to merge consecutive drafts into one."""
+        return [
+            SystemMessage(
+                content=(
+                    "The user will provide consecutive parts of a markdown blog "
+                    "post, each written from a section of the same transcript "
+                    "and separated by '---'. Merge them, in order, into a single "
+                    "coherent in-depth markdown blog post using sections and "
+                    "section headers. Remove repeated titles, introductions and "
+                    "conclusions but keep every detail. "
+                    f"The title of the blog post will be {self.metadata.title}."
+                )
+            ),
+            HumanMessage(content="\n\n---\n\n".join(drafts)),
+        ]
+
+    def _reduce(self, drafts: list) -> list:
+        """Merges drafts level by level until they fit into a single merge.
+
+        Each level packs consecutive drafts into groups of at most fan_in
+        drafts and MERGE_CONTEXT_SIZE tokens and merges the groups in
+        parallel, so the number of levels grows logarithmically with the
+        number of drafts.
+
+        Args:
+            drafts (list): The per-chunk drafts, in transcript order.
+
+        Returns:
+            list: The drafts that make up the last group to merge.
+        """
+        if len(drafts) <= 1:
+            return drafts
+
+        groups = self._group(drafts)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(groups) > 1:
+                try:
+                    if self._expired():
+                        raise TimeoutError("The run deadline has passed.")
+                    drafts = list(executor.map(self._merge, groups))
+                except TimeoutError:
+                    self.truncated = True
+                    return drafts
+                groups = self._group(drafts)
+
+        return groups[0]
+
+    def _group(self, drafts: list) -> list:
+        """Packs consecutive drafts into groups that fit a merge request.
+
+        A group always takes at least two drafts, so every level shrinks
+        the number of drafts even when they are individually large.
+
+        Args:
+            drafts (list): The drafts to group.
+
+        Returns:
+            list: The groups of drafts.
+        """
+        sizes = [count_tokens(draft) for draft in drafts]
+
+        return [
+            [drafts[i] for i in group]
+            for group in group_sizes(sizes, self.fan_in, self.MERGE_CONTEXT_SIZE)
+        ]
+
+    def _merge(self, drafts: list) -> str:
+        """Merges a group of drafts into one with a single chat request, or
+        joins them unmerged if the request times out before the deadline."""
+        if len(drafts) == 1:
+            return drafts[0]
+
+        try:
+            return "".join(self._request(self._merge_messages(drafts)))
+        except TimeoutError:
+            if self._expired():
+                raise
+            self.truncated = True
+            return "\n\n".join(drafts)
+
+    def _map(self, build_messages: Callable[[str], list]) -> Iterator[Iterator[str]]:
+        """Lazily runs the chat model over each transcript chunk.
+
+        Args:
+            build_messages (Callable[[str], list]): Builds the messages for
+                a transcript chunk.
+
+        Yields:
+            Iterator[str]: The streamed response for the next chunk. Chunks
+                whose request times out are skipped, and once the run
+                deadline has passed no further chunks are requested.
+        """
+        for transcript in self._iter_transcript():
+            try:
+                if self._expired():
+                    raise TimeoutError("The run deadline has passed.")
+                tokens = self._request_chunk(build_messages(transcript))
+            except TimeoutError:
+                self.truncated = True
+                if self._expired():
+                    return
+                continue
+            yield tokens
+
+    def _request(self, messages: list, temperature: float = 1.0) -> Iterator[str]:
+        """Sends a chat request, hedged and bounded by the request timeout
+        and the run deadline when either is configured.
+
+        Args:
+            messages (list): The list of messages in the conversation.
+            temperature (float): The temperature parameter for generating
+                responses. Defaults to 1.0.
+
+        Raises:
+            TimeoutError: If the request did not complete in time.
+
+        Returns:
+            Iterator[str]: The generated responses.
+        """
+        timeout = self._timeout()
+        if not self.hedger.hedge and timeout is None:
+            return self._chat(temperature=temperature, messages=messages)
+
+        text = self.hedger.run(
+            lambda: self._chat(
+                temperature=temperature, messages=messages, timeout=timeout
+            ),
+            timeout=timeout,
+        )
+
+        return iter([text])
+
+    def _request_chunk(self, messages: list) -> Iterator[str]:
+        """Sends the request for a transcript chunk, or replays its cached
+        response when the cache already holds one for the same messages."""
+        if self.cache is None:
+            return self._request(messages)
+
+        key = self.cache.key(messages)
+        text = self.cache.get(key)
+        if text is not None:
+            return iter([text])
+
+        return self.cache.record(key, self._request(messages))
+
+    def _complete(self, messages: list) -> str:
+        """Sends the request for a transcript chunk and returns its whole
+        response, or None if it timed out or the run deadline has passed."""
+        try:
+            if self._expired():
+                raise TimeoutError("The run deadline has passed.")
+            return "".join(self._request_chunk(messages))
+        except TimeoutError:
+            self.truncated = True
+            return None
+
+    def _timeout(self) -> float:
+        """Returns the timeout for the next request, or None for no timeout.
+        Hedged requests time out after HEDGED_REQUEST_TIMEOUT at the latest."""
+        timeouts = [self.request_timeout]
+        if self.hedger.hedge:
+            timeouts.append(self.HEDGED_REQUEST_TIMEOUT)
+        if self.deadline_at is not None:
+            timeouts.append(max(0.0, self.deadline_at - time.monotonic()))
+        timeouts = [timeout for timeout in timeouts if timeout is not None]
+
+        return min(timeouts) if timeouts else None
+
+    def _expired(self) -> bool:
+        """Returns whether the run deadline has passed."""
+        return self.deadline_at is not None and time.monotonic() >= self.deadline_at
+
+    def ask(self, question: str, k: int = 4, index_path: str = None) -> str:
+        """Answers a question about the transcript using only the k most
+        relevant transcript chunks, so the prompt size does not grow with the
+        length of the video.
+
+        Args:
+            question (str): The question to answer.
+            k (int): The number of chunks to retrieve. Defaults to 4.
+            index_path (str): Where to persist the chunk index for reuse.
+                Defaults to None, which keeps the index in memory only.
+
+        Returns:
+            str: The answer.
+        """
+        if not question:
+            raise ValueError("question must be specified.")
+
+        index = VectorIndex.open(
+            index_path,
+            lambda: self._split_transcript(chunk_size=self.ASK_CHUNK_SIZE),
+            self.transcript,
+            chunking=f"{CHUNKER_VERSION}:{self.ASK_CHUNK_SIZE}",
+        )
+        excerpts = "\n\n---\n\n".join(index.search(question, k=k))
+        messages = [
+            SystemMessage(
+                content=(
+                    "The user will ask a question about the video "
+                    f"'{self.metadata.title}'. Answer it using only the "
+                    "following excerpts from the video's transcript. If the "
+                    "excerpts do not contain the answer, say so.\n\n"
+                    f"{excerpts}"
+                )
+            ),
+            HumanMessage(content=question),
+        ]
+
+        return "".join(self._request(messages, temperature=0.0))
 
     @staticmethod
     def _chat(
         model: str = "gpt-3.5-turbo-16k",
         temperature: float = 0.0,
         messages: list = None,
-    ) -> list:
+        timeout: float = None,
+    ) -> Iterator[str]:
         """Perform a chat conversation using the specified model and messages.
 
         Args:
@@ -101,24 +427,93 @@ class AI:
                 responses. Defaults to 0.0.
             messages (list): The list of messages in the conversation.
                 Must be specified.
+            timeout (float): The number of seconds after which the HTTP
+                request is abandoned. Defaults to None.
 
         Returns:
-            list: The list of generated responses.
+            Iterator[str]: The generated responses, as they are streamed.
         """
         if messages is None:
             raise ValueError("messages must be specified.")
-        chat = ChatOpenAI(temperature=temperature, model=model)
+        if timeout is None:
+            chat = ChatOpenAI(temperature=temperature, model=model)
+        else:
+            chat = ChatOpenAI(
+                temperature=temperature, model=model, request_timeout=timeout
+            )
+
+        return (chunk.content for chunk in chat.stream(messages))
 
-        return [chunk.content for chunk in chat.stream(messages)]
+    def _iter_transcript(self, chunk_size: int = 10000) -> Iterator[str]:
+        """Lazily split the transcript into chunks of at most chunk_size tokens.
 
-    def _split_transcript(self) -> list:
-        """Split the transcript into chunks using a character-based text splitter.
+        Chunk boundaries depend on the words around them rather than on
+        their position, so that a corrected transcript keeps most of its
+        chunks, and their cached responses (see iter_content_chunks).
+
+        Args:
+            chunk_size (int): The maximum number of tokens per chunk.
+                Defaults to 10000.
+
+        Returns:
+            Iterator[str]: The transcript chunks.
+        """
+        return iter_content_chunks(self.transcript, chunk_size=chunk_size)
+
+    def _split_transcript(self, chunk_size: int = 10000) -> list:
+        """Split the transcript into chunks of at most chunk_size tokens.
+
+        Args:
+            chunk_size (int): The maximum number of tokens per chunk.
+                Defaults to 10000.
 
         Returns:
             A list of transcript chunks.
         """
-        transcript_splitter = CharacterTextSplitter.from_tiktoken_encoder(
-            chunk_size=10000, chunk_overlap=0
-        )
+        return list(self._iter_transcript(chunk_size=chunk_size))
+
+
+def takeaways_messages(title: str, transcript: str) -> list:
+    """Builds the messages asking for the key takeaways of a chunk.
+
+    Args:
+        title (str): The title of the video.
+        transcript (str): The transcript chunk.
 
-        return transcript_splitter.split_text(self.transcript)
+    Returns:
+        list: The messages of the request.
+    """
+    return [
+        SystemMessage(
+            content=(
+                "The user will provide a transcript."
+                "From the transcript, you will provide a bulleted list of "
+                "key takeaways. At the top of the list, add a title: "
+                f"'# Key Takeaways — {title}'"
+            )
+        ),
+        HumanMessage(content=transcript),
+    ]
+
+
+def summary_messages(title: str, transcript: str) -> list:
+    """Builds the messages asking for a blog post form of a chunk.
+
+    Args:
+        title (str): The title of the video.
+        transcript (str): The transcript chunk.
+
+    Returns:
+        list: The messages of the request.
+    """
+    return [
+        SystemMessage(
+            content=(
+                "The user will provide a transcript."
+                "reformat the transcript  into an in-depth "
+                "markdown blog post using sections and section headers."
+                f"The title of the blog post will be {title}."
+            )
+        ),
+        HumanMessage(content=transcript),
+    ]
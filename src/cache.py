@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Iterator
+
+from attrs import define
+
+
+@define
+class CacheStats:
+    """Counts the lookups of a ResultCache."""
+
+    hits: int = 0
+    misses: int = 0
+
+    def print(self) -> str:
+        """Prints the cache statistics."""
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return f"Cached Chunks: {self.hits} of {lookups} ({rate:.0%})\n"
+
+
+class ResultCache:
+    """
+    A directory of model responses keyed by the hash of their request, so
+    that chunks whose content is unchanged are not requested again.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initializes an instance of the ResultCache class.
+
+        Args:
+            path (str): The directory the responses are stored in. It is
+                created if it does not exist.
+
+        Returns:
+            None
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(messages: list) -> str:
+        """
+        Returns the key of a request: the SHA-256 of its messages, which
+        include the chunk, its instructions and the video title.
+
+        Args:
+            messages (list): The messages of the request.
+
+        Returns:
+            str: The key, as a hexadecimal string.
+        """
+        data = json.dumps([[message.type, message.content] for message in messages])
+
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def __contains__(self, key: str) -> bool:
+        """Returns whether a response is cached for the given key, without
+        counting a lookup."""
+        return os.path.exists(self._file(key))
+
+    def get(self, key: str) -> str:
+        """
+        Returns the cached response for the given key, or None.
+
+        Args:
+            key (str): The key of the request.
+
+        Returns:
+            str: The response, or None if it is not cached.
+        """
+        try:
+            with open(self._file(key), encoding="utf-8") as file:
+                text = file.read()
+        except FileNotFoundError:
+            text = None
+
+        with self._lock:
+            if text is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """
+        Caches the response for the given key.
+
+        The response is written to a temporary file first, so that
+        concurrent or interrupted runs never leave a partial response.
+
+        Args:
+            key (str): The key of the request.
+            text (str): The response.
+
+        Returns:
+            None
+        """
+        descriptor, temporary = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(temporary, self._file(key))
+
+    def record(self, key: str, pieces: Iterator[str]) -> Iterator[str]:
+        """
+        Streams a response, caching it once it is complete.
+
+        Args:
+            key (str): The key of the request.
+            pieces (Iterator[str]): The streamed response.
+
+        Yields:
+            str: The next piece of the response.
+        """
+        text = []
+        for piece in pieces:
+            text.append(piece)
+            yield piece
+        self.put(key, "".join(text))
+
+    def _file(self, key: str) -> str:
+        """Returns the file of the response for the given key."""
+        return os.path.join(self.path, f"{key}.txt")
@@ -0,0 +1,138 @@
+import glob
+import json
+import os
+import re
+from typing import IO, Iterator
+
+CAPTION_SUFFIXES = (".srt", ".vtt", ".json")
+INFO_SUFFIX = ".info.json"
+
+_TAG = re.compile(r"<[^>]*>")
+_TIMING = re.compile(r"-->")
+_JSON_SEPARATORS = re.compile(r"[\s,]*")
+
+
+def iter_srt(lines: IO[str]) -> Iterator[str]:
+    """
+    Lazily parses the text of the cues of a SubRip (.srt) file.
+
+    Args:
+        lines (IO[str]): The lines of the file.
+
+    Yields:
+        str: The text of the next cue line.
+    """
+    return _iter_cues(lines, dedupe=False)
+
+
+def iter_vtt(lines: IO[str]) -> Iterator[str]:
+    """
+    Lazily parses the text of the cues of a WebVTT (.vtt) file.
+
+    Repeated lines, as found in the rolling captions generated by YouTube,
+    are only yielded once.
+
+    Args:
+        lines (IO[str]): The lines of the file.
+
+    Yields:
+        str: The text of the next cue line.
+    """
+    return _iter_cues(lines, dedupe=True)
+
+
+def _iter_cues(lines: IO[str], dedupe: bool) -> Iterator[str]:
+    """Yields the text lines that follow a cue timing line, without markup."""
+    in_cue = False
+    previous = None
+    for line in lines:
+        line = line.strip().lstrip("\ufeff")
+        if not line:
+            in_cue = False
+        elif _TIMING.search(line):
+            in_cue = True
+        elif in_cue:
+            text = _TAG.sub("", line).strip()
+            if text and not (dedupe and text == previous):
+                previous = text
+                yield text
+
+
+def iter_json(file: IO[str], buffer_size: int = 65536) -> Iterator[str]:
+    """
+    Lazily parses the text of a youtube-transcript-api JSON export, a list of
+    objects with "text", "start" and "duration" keys.
+
+    The file is decoded one object at a time, so it is never fully loaded.
+
+    Args:
+        file (IO[str]): The file to parse.
+        buffer_size (int): How many characters to read at a time.
+            Defaults to 65536.
+
+    Yields:
+        str: The text of the next caption.
+    """
+    decoder = json.JSONDecoder()
+    buffer = file.read(buffer_size).lstrip("\ufeff").lstrip()
+    if not buffer.startswith("["):
+        raise ValueError("Caption JSON must be a list of captions.")
+
+    position = 1
+    while True:
+        position = _JSON_SEPARATORS.match(buffer, position).end()
+        if buffer.startswith("]", position):
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            more = file.read(buffer_size)
+            if not more:
+                raise ValueError("Caption JSON ended unexpectedly.")
+            buffer = buffer[position:] + more
+            position = 0
+            continue
+
+        text = item.get("text", "").strip() if isinstance(item, dict) else ""
+        if text:
+            yield text.replace("\n", " ")
+
+
+def iter_captions(path: str) -> Iterator[str]:
+    """
+    Lazily parses the caption text of a .srt, .vtt or .json file.
+
+    Args:
+        path (str): The caption file.
+
+    Yields:
+        str: The text of the next caption.
+    """
+    parsers = {".srt": iter_srt, ".vtt": iter_vtt, ".json": iter_json}
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix not in parsers:
+        raise ValueError(f"Unsupported caption format: {path}")
+
+    with open(path, encoding="utf-8") as file:
+        yield from parsers[suffix](file)
+
+
+def iter_caption_files(pattern: str) -> Iterator[str]:
+    """
+    Finds the caption files in a directory or matching a glob pattern.
+
+    Args:
+        pattern (str): A caption file, a directory of caption files or a
+            glob pattern such as "captions/**/*.vtt".
+
+    Yields:
+        str: The path of the next caption file, in sorted order.
+    """
+    if os.path.isdir(pattern):
+        paths = (entry.path for entry in os.scandir(pattern) if entry.is_file())
+    else:
+        paths = glob.iglob(pattern, recursive=True)
+
+    for path in sorted(paths):
+        if path.lower().endswith(CAPTION_SUFFIXES) and not path.endswith(INFO_SUFFIX):
+            yield path
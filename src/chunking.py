@@ -0,0 +1,172 @@
+import functools
+import hashlib
+import math
+import re
+from typing import Callable, Iterator
+
+import tiktoken
+
+# Identifies how iter_content_chunks places boundaries. Change it whenever
+# the boundaries change, so that indexes of the old chunks are rebuilt.
+CHUNKER_VERSION = "gear-64-1"
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding() -> tiktoken.Encoding:
+    """Returns the tiktoken encoding used by the chat models."""
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str) -> int:
+    """Returns the number of tokens in the given text."""
+    return len(_encoding().encode_ordinary(text))
+
+
+@functools.lru_cache(maxsize=65536)
+def _count_word_tokens(word: str) -> int:
+    """Returns the number of tokens in a single word, memoized."""
+    return count_tokens(word)
+
+
+@functools.lru_cache(maxsize=65536)
+def _gear(word: str) -> int:
+    """Returns the pseudo-random 64-bit gear value of a word, memoized."""
+    digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+
+    return int.from_bytes(digest, "little")
+
+
+def iter_content_chunks(
+    text: str,
+    chunk_size: int = 10000,
+    average_size: int = None,
+    min_size: int = None,
+    length_function: Callable[[str], int] = None,
+) -> Iterator[str]:
+    """
+    Lazily splits text on whitespace into content-defined chunks of at most
+    chunk_size tokens.
+
+    Boundaries are chosen by a gear rolling hash of the last 64 words, as in
+    FastCDC, rather than by position. An edit therefore only moves the
+    boundaries next to it, and the chunks before and after it stay the same,
+    so their results can be reused (see ResultCache). Only the chunk
+    currently being built is held in memory.
+
+    Each word past min_size ends a chunk with a probability proportional to
+    its tokens, so that chunks average about average_size tokens. A chunk
+    that reaches chunk_size without a boundary is cut there.
+
+    Args:
+        text (str): The text to split.
+        chunk_size (int): The maximum number of tokens per chunk.
+            Defaults to 10000.
+        average_size (int): The targeted average number of tokens per
+            chunk. Defaults to three quarters of chunk_size.
+        min_size (int): The number of tokens per chunk below which no
+            boundary is chosen. Defaults to half of chunk_size.
+        length_function (Callable[[str], int]): Counts the tokens in a word.
+            Defaults to the tiktoken encoding of the chat models.
+
+    Yields:
+        str: The next chunk of text.
+    """
+    average_size, min_size = _boundary_sizes(chunk_size, average_size, min_size)
+    length_function = length_function or _count_word_tokens
+    spread = average_size - min_size
+
+    words = []
+    size = 0
+    fingerprint = 0
+    for match in re.finditer(r"\S+", text):
+        word = match.group()
+        length = length_function(" " + word)
+        if words and size + length > chunk_size:
+            yield " ".join(words)
+            words = []
+            size = 0
+        words.append(word)
+        size += length
+
+        fingerprint = ((fingerprint << 1) + _gear(word)) & 0xFFFFFFFFFFFFFFFF
+        if size >= min_size and (fingerprint >> 32) * spread < length << 32:
+            yield " ".join(words)
+            words = []
+            size = 0
+
+    if words:
+        yield " ".join(words)
+
+
+def expected_chunk_size(
+    chunk_size: int = 10000, average_size: int = None, min_size: int = None
+) -> float:
+    """
+    Returns the expected number of tokens per chunk of iter_content_chunks.
+
+    Past min_size, every token ends a chunk with the same probability, so
+    the tokens beyond min_size are exponentially distributed, cut off at
+    chunk_size. The expected size is therefore somewhat below average_size,
+    about 72% of chunk_size with the default sizes.
+
+    Args:
+        chunk_size (int): The maximum number of tokens per chunk.
+            Defaults to 10000.
+        average_size (int): The targeted average number of tokens per
+            chunk. Defaults to three quarters of chunk_size.
+        min_size (int): The number of tokens per chunk below which no
+            boundary is chosen. Defaults to half of chunk_size.
+
+    Returns:
+        float: The expected number of tokens per chunk.
+    """
+    average_size, min_size = _boundary_sizes(chunk_size, average_size, min_size)
+    spread = average_size - min_size
+
+    return min_size + spread * -math.expm1(-(chunk_size - min_size) / spread)
+
+
+def _boundary_sizes(chunk_size: int, average_size: int, min_size: int) -> tuple:
+    """Returns the average and minimum chunk sizes, defaulted and validated."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive.")
+    average_size = average_size or max(1, chunk_size * 3 // 4)
+    min_size = chunk_size // 2 if min_size is None else min_size
+    if not 0 <= min_size < average_size <= chunk_size:
+        raise ValueError("Expected 0 <= min_size < average_size <= chunk_size.")
+
+    return average_size, min_size
+
+
+def group_sizes(sizes: list, fan_in: int, max_size: int) -> list:
+    """
+    Packs consecutive items into groups of at most fan_in items and, where
+    possible, at most max_size tokens.
+
+    A group always takes at least two items, so that merging every group
+    shrinks the number of items even when they are individually large.
+
+    Args:
+        sizes (list): The token count of each item.
+        fan_in (int): The maximum number of items per group.
+        max_size (int): The maximum number of tokens per group.
+
+    Returns:
+        list: The groups, as lists of item indices.
+    """
+    groups = []
+    group = []
+    size = 0
+    for index, tokens in enumerate(sizes):
+        full = len(group) == fan_in
+        too_large = len(group) >= 2 and size + tokens > max_size
+        if full or too_large:
+            groups.append(group)
+            group = []
+            size = 0
+        group.append(index)
+        size += tokens
+    if group:
+        groups.append(group)
+
+    return groups
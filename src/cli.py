@@ -1,19 +1,33 @@
 #!/usr/bin/env python3
+import fnmatch
+import hashlib
 import os
-import sys
+import time
+from typing import IO, Callable, Iterable, Iterator
 
 import click
 import slugify
 
 from src.ai import AI
+from src.cache import ResultCache
+from src.chunking import count_tokens, iter_content_chunks
+from src.dedup import DedupIndex
+from src.hedging import Hedger
+from src.planning import Planner
+from src.scheduler import Job, Scheduler
 from src.transcript import Transcript
 
+SEPARATOR = "\n\n---\n\n"
+
 
 @click.command()
 @click.option(
     "--url",
     prompt="The URL of the YouTube video.",
-    help="The URL of the YouTube video.",
+    help=(
+        "The URL of the YouTube video, or a local .srt/.vtt/.json caption file, "
+        "directory or glob pattern."
+    ),
 )
 @click.option(
     "--transcript-only",
@@ -36,6 +50,129 @@ from src.transcript import Transcript
     help="Whether or not to include video metadata in the ouput",
     default=True,
 )
+@click.option(
+    "--ask",
+    help="Answer a question about the video instead of summarizing it",
+    default=None,
+)
+@click.option(
+    "--index",
+    help=(
+        "Path of the transcript index used by --ask; reused across runs. "
+        "For local caption files, a directory with one index per video"
+    ),
+    default=None,
+    type=click.Path(),
+)
+@click.option(
+    "--fan-in",
+    help="How many partial articles to merge per request for long videos",
+    default=4,
+    show_default=True,
+    type=click.IntRange(min=2),
+)
+@click.option(
+    "--workers",
+    help="How many merge requests, or scheduled requests, to run in parallel",
+    default=4,
+    show_default=True,
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--request-timeout",
+    help="Seconds after which a single model request is abandoned",
+    default=None,
+    type=click.FloatRange(min=0, min_open=True),
+)
+@click.option(
+    "--deadline",
+    help="Seconds after which to stop and output the chunks completed so far",
+    default=None,
+    type=click.FloatRange(min=0, min_open=True),
+)
+@click.option(
+    "--hedge/--no-hedge",
+    help=(
+        "Whether to duplicate requests that are slow to start responding. "
+        "Hedged requests time out after 120 seconds unless --request-timeout "
+        "is shorter"
+    ),
+    default=False,
+)
+@click.option(
+    "--hedge-percentile",
+    help="Percentile of observed time to first token after which to hedge",
+    default=95.0,
+    show_default=True,
+    type=click.FloatRange(min=0, max=100, min_open=True),
+)
+@click.option(
+    "--dedup-index",
+    help="Path of an index of past results to reuse for near-duplicate videos",
+    default=None,
+    type=click.Path(dir_okay=False),
+)
+@click.option(
+    "--similarity",
+    help="Transcript similarity above which a past result is reused",
+    default=0.8,
+    show_default=True,
+    type=click.FloatRange(min=0, max=1, min_open=True),
+)
+@click.option(
+    "--schedule/--no-schedule",
+    help=(
+        "Process the chunks of all videos concurrently, shortest job first, "
+        "instead of one video at a time"
+    ),
+    default=False,
+)
+@click.option(
+    "--priority",
+    "priorities",
+    help=(
+        "PATTERN=LEVEL: with --schedule, videos whose URL or title matches "
+        "the glob PATTERN are started sooner, each level halving their "
+        "effective size. Repeatable; the highest matching level applies"
+    ),
+    multiple=True,
+    callback=lambda ctx, param, values: [_parse_priority(value) for value in values],
+)
+@click.option(
+    "--cache-dir",
+    help="Directory where fetched transcripts are cached for later runs",
+    default=None,
+    type=click.Path(file_okay=False),
+)
+@click.option(
+    "--chunk-cache",
+    help=(
+        "Directory where the response for each transcript chunk is cached, "
+        "so re-runs only request the chunks that changed"
+    ),
+    default=None,
+    type=click.Path(file_okay=False),
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Estimate requests, tokens, cost and time without calling the model",
+    default=False,
+)
+@click.option(
+    "--rpm",
+    help="The API's requests per minute limit, used by --dry-run",
+    default=3500,
+    show_default=True,
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--tpm",
+    help="The API's tokens per minute limit, used by --dry-run",
+    default=60000,
+    show_default=True,
+    type=click.IntRange(min=1),
+)
 @click.option(
     "--write", is_flag=True, help="whether or not to write a file", default=False
 )
@@ -45,6 +182,23 @@ def main(
     takeaways: bool,
     article: bool,
     metadata: bool,
+    ask: str,
+    index: str,
+    fan_in: int,
+    workers: int,
+    request_timeout: float,
+    deadline: float,
+    hedge: bool,
+    hedge_percentile: float,
+    dedup_index: str,
+    similarity: float,
+    schedule: bool,
+    priorities: list,
+    cache_dir: str,
+    chunk_cache: str,
+    dry_run: bool,
+    rpm: int,
+    tpm: int,
     write: bool,
 ) -> None:
     """
@@ -52,43 +206,480 @@ def main(
     generates the desired output.
 
     Args:
-        url (str): The URL of the YouTube video.
+        url (str): The URL of the YouTube video, or local caption files.
         transcript_only (bool): Flag indicating whether to output only the transcript.
         takeaways (bool): Flag indicating whether to output the takeaways.
         article (bool): Flag indicating whether to output the article summary.
         metadata (bool): Flag indicating whether to output the video metadata.
+        ask (str): A question to answer about the video instead of summarizing it.
+        index (str): Path of the transcript index used to answer the question,
+            or for local caption files, a directory of one index per video.
+        fan_in (int): The number of partial articles merged per request.
+        workers (int): The number of merge requests run in parallel.
+        request_timeout (float): Seconds after which a single request is abandoned.
+        deadline (float): Seconds after which to output only the completed chunks.
+        hedge (bool): Flag indicating whether to duplicate slow requests.
+        hedge_percentile (float): The time to first token percentile to hedge at.
+        dedup_index (str): Path of the index of results for near-duplicate videos.
+        similarity (float): The similarity above which a past result is reused.
+        schedule (bool): Flag indicating whether to process all videos concurrently.
+        priorities (list): The (pattern, level) priorities of scheduled videos.
+        cache_dir (str): Directory where fetched transcripts are cached.
+        chunk_cache (str): Directory where chunk responses are cached.
+        dry_run (bool): Flag indicating whether to only estimate the work.
+        rpm (int): The API's requests per minute limit.
+        tpm (int): The API's tokens per minute limit.
         write (bool): Flag indicating whether to write the output to a file.
 
     Returns:
         None
     """
-    transcript = Transcript.get_transcript(url)
-    output = []
-    if write:
-        filename = f"{slugify.slugify(transcript.metadata.title)}.md"
-        if os.path.isfile(filename):
-            raise FileExistsError(f"{filename} already exists")
-        sys.stdout = open(filename, "a")
-
     if transcript_only:
-        output.append(transcript.content)
         takeaways = False
         article = False
         metadata = False
+        ask = None
+
+    if ask:
+        takeaways = False
+        article = False
+
+    if dry_run:
+        kinds = [
+            kind
+            for kind, wanted in [
+                ("article", article),
+                ("takeaways", takeaways),
+                ("ask", ask),
+            ]
+            if wanted
+        ]
+        planner = Planner(
+            fan_in=fan_in,
+            merge_context_size=AI.MERGE_CONTEXT_SIZE,
+            ask_chunk_size=AI.ASK_CHUNK_SIZE,
+            workers=workers,
+            cache=ResultCache(chunk_cache) if chunk_cache else None,
+        )
+        plan = planner.plan(
+            _load(url, cache_dir),
+            kinds,
+            requests_per_minute=rpm,
+            tokens_per_minute=tpm,
+            schedule=schedule,
+        )
+        click.echo(plan.print(), nl=False)
+        return
+
+    dedup = DedupIndex.open(dedup_index, threshold=similarity) if dedup_index else None
+    cache = ResultCache(chunk_cache) if chunk_cache else None
+    hedger = Hedger(percentile=hedge_percentile, hedge=hedge)
+    deadline_at = None if deadline is None else time.monotonic() + deadline
+    truncated = False
+
+    def make_ai(transcript: Transcript) -> AI:
+        return AI(
+            transcript,
+            fan_in=fan_in,
+            max_workers=workers,
+            hedger=hedger,
+            request_timeout=request_timeout,
+            cache=cache,
+            deadline_at=deadline_at,
+        )
+
+    kinds = [
+        kind
+        for kind, wanted in [("article", article), ("takeaways", takeaways)]
+        if wanted
+    ]
+    if not any([takeaways, article, ask]):
+        make_ai = None
+    if not kinds:
+        dedup = None
+
+    transcripts = _load(url, cache_dir)
+    if write:
+        transcripts = _unwritten(transcripts)
+    if schedule and kinds:
+        runs = _scheduled(transcripts, make_ai, dedup, kinds, workers, priorities)
+    else:
+        runs = _sequential(transcripts, make_ai, dedup)
+
+    try:
+        for transcript, ai, match, streams in runs:
+            out = None
+            if write:
+                filename = _output_path(transcript)
+                if os.path.isfile(filename):
+                    error = FileExistsError(f"{filename} already exists")
+                    _skip(transcript.metadata.url, error)
+                    continue
+                out = open(filename, "a")
+
+            if transcript_only:
+                _write([transcript.content], out)
+            if ask:
+                index_path = _index_path(index, url, transcript)
+                _write([ai.ask(ask, index_path=index_path), SEPARATOR], out)
+            results = {} if dedup is not None else None
+            for kind in kinds:
+                _write(_reuse(kind, streams.get(kind), match, transcript, results), out)
+                _write([SEPARATOR], out)
+            if dedup is not None and not ai.truncated:
+                dedup.add(
+                    transcript.metadata.url,
+                    transcript.content,
+                    transcript.metadata.title,
+                    results,
+                )
+            if metadata:
+                _write([transcript.metadata.print()], out)
+
+            _write(["\n"], out)
+            if out is not None:
+                out.close()
+
+            if ai is not None and ai.truncated:
+                truncated = True
+    finally:
+        if dedup is not None:
+            dedup.save()
+
+    if truncated:
+        click.echo(
+            "Requests timed out or the deadline was reached: "
+            "the output is incomplete.",
+            err=True,
+        )
+    if make_ai is not None and any([hedge, request_timeout, deadline]):
+        click.echo(hedger.stats.print(), err=True, nl=False)
+
+    if cache is not None:
+        click.echo(cache.stats.print(), err=True, nl=False)
+
+
+def _sequential(
+    transcripts: Iterable[Transcript],
+    make_ai: Callable[[Transcript], AI],
+    dedup: DedupIndex,
+) -> Iterator[tuple]:
+    """
+    Prepares the transcripts one at a time, streaming their results.
+
+    Args:
+        transcripts (Iterable[Transcript]): The transcripts to process.
+        make_ai (Callable[[Transcript], AI]): Creates the AI for a
+            transcript, or None if no AI is needed.
+        dedup (DedupIndex): The index of past results, or None.
+
+    Yields:
+        tuple: The transcript, its AI, its near-duplicate match and a
+            mapping from each kind of result to a function streaming it.
+    """
+    for transcript in transcripts:
+        ai = make_ai(transcript) if make_ai else None
+        match = dedup.query(transcript.content) if dedup else None
+        streams = {}
+        if ai is not None:
+            streams = {"article": ai.stream_summary, "takeaways": ai.stream_takeaways}
+        yield transcript, ai, match, streams
+
+
+def _scheduled(
+    transcripts: Iterable[Transcript],
+    make_ai: Callable[[Transcript], AI],
+    dedup: DedupIndex,
+    kinds: list,
+    workers: int,
+    priorities: list,
+) -> Iterator[tuple]:
+    """
+    Processes the chunks of all transcripts concurrently, shortest job
+    first, yielding each transcript once its results are complete.
+
+    Each job's chunks are the (kind, chunk) requests of one transcript,
+    costed by their token count. Once all chunks of a job are processed,
+    the article drafts are merged on the scheduler's workers.
+
+    A transcript that duplicates one already submitted in this run is not
+    submitted itself: it is held back and reuses that job's results.
+
+    Args:
+        transcripts (Iterable[Transcript]): The transcripts to process.
+        make_ai (Callable[[Transcript], AI]): Creates the AI for a transcript.
+        dedup (DedupIndex): The index of past results, or None.
+        kinds (list): The kinds of results to produce.
+        workers (int): The number of requests run in parallel.
+        priorities (list): The (pattern, level) priorities of the videos
+            (see _priority).
+
+    Yields:
+        tuple: The transcript, its AI, its near-duplicate match and a
+            mapping from each kind of result to a function streaming it.
+    """
+    scheduler = Scheduler(workers=workers)
+    batch = None
+    if dedup is not None:
+        batch = DedupIndex(threshold=dedup.threshold, hasher=dedup.hasher)
+    jobs = {}
+    held = {}
+    for transcript in transcripts:
+        match = dedup.query(transcript.content) if dedup else None
+        if match is None and batch is not None:
+            twin = batch.query(transcript.content)
+            if twin is not None:
+                held[jobs[twin["key"]]].append((transcript, twin["similarity"]))
+                continue
+
+        ai = make_ai(transcript)
+        needed = [
+            kind for kind in kinds if match is None or kind not in match["results"]
+        ]
+        if not needed:
+            yield transcript, ai, match, {}
+            continue
+
+        chunks = [
+            (kind, chunk)
+            for chunk in iter_content_chunks(transcript.content)
+            for kind in needed
+        ]
+        job = scheduler.submit(
+            transcript.metadata.title,
+            chunks,
+            costs=[count_tokens(chunk) for _, chunk in chunks],
+            priority=_priority(priorities, transcript),
+            payload=(transcript, ai, match),
+        )
+        if batch is not None:
+            key = str(len(jobs))
+            batch.add(key, transcript.content, transcript.metadata.title, {})
+            jobs[key] = job
+            held[job] = []
 
-    if any([takeaways, article]):
-        ai = AI(transcript)
+    def process(job: Job, request: tuple) -> str:
+        _, ai, _ = job.payload
+        kind, chunk = request
+        if kind == "article":
+            return ai.summarize_chunk(chunk)
+        return ai.extract_takeaways(chunk)
 
-    if article:
-        output.append("".join(ai.summary()))
-        output.append("\n\n---\n\n")
-    if takeaways:
-        output.append("".join((ai.takeaways())))
-        output.append("\n\n---\n\n")
-    if metadata:
-        output.append(transcript.metadata.print())
+    def combine(job: Job) -> None:
+        _, ai, _ = job.payload
+        outputs = {}
+        for (kind, _), result in zip(job.chunks, job.results):
+            outputs.setdefault(kind, []).append(result)
+        job.results = {
+            "article": "".join(ai.merge_summaries(outputs.get("article", []))),
+            "takeaways": "".join(
+                result for result in outputs.get("takeaways", []) if result
+            ),
+        }
 
-    print("".join(output))
+    for job in scheduler.run(process, on_complete=combine):
+        transcript, ai, match = job.payload
+        streams = {
+            kind: (lambda text=text: iter([text])) for kind, text in job.results.items()
+        }
+        yield transcript, ai, match, streams
+
+        for twin, score in held.pop(job, []):
+            reused = {
+                "key": transcript.metadata.url,
+                "title": transcript.metadata.title,
+                "results": job.results,
+                "similarity": score,
+            }
+            yield twin, ai, reused, {}
+
+    if scheduler.jobs:
+        click.echo(scheduler.report().print(), err=True, nl=False)
+
+
+def _parse_priority(value: str) -> tuple:
+    """
+    Parses a --priority option of the form PATTERN=LEVEL.
+
+    Args:
+        value (str): The option's value.
+
+    Returns:
+        tuple: The glob pattern and the integer priority level.
+
+    Raises:
+        click.BadParameter: If the value is not of the form PATTERN=LEVEL.
+    """
+    pattern, _, level = value.rpartition("=")
+    if not pattern or not level.lstrip("-").isdigit():
+        raise click.BadParameter(f"expected PATTERN=LEVEL, got {value!r}")
+
+    return pattern, int(level)
+
+
+def _priority(priorities: list, transcript: Transcript) -> int:
+    """
+    Returns the scheduling priority of a video: the highest level whose
+    pattern matches the video's URL or title, or 0 if none does.
+
+    Args:
+        priorities (list): The (pattern, level) priorities.
+        transcript (Transcript): The transcript of the video.
+
+    Returns:
+        int: The priority level.
+    """
+    metadata = transcript.metadata
+    levels = [
+        level
+        for pattern, level in priorities
+        if fnmatch.fnmatch(metadata.url, pattern)
+        or fnmatch.fnmatch(metadata.title, pattern)
+    ]
+
+    return max(levels, default=0)
+
+
+def _reuse(
+    kind: str,
+    run: Callable[[], Iterator[str]],
+    match: dict,
+    transcript: Transcript,
+    results: dict,
+) -> Iterator[str]:
+    """
+    Reuses the result of a near-duplicate video when there is one, otherwise
+    streams a new result. Either way the result is recorded in results,
+    unless results is None, so that a streamed result is only held in memory
+    when it is indexed.
+
+    A reused result has the duplicate's title replaced by this video's title.
+
+    Args:
+        kind (str): The kind of result, "article" or "takeaways".
+        run (Callable[[], Iterator[str]]): Streams a new result. Only
+            called when there is no match, so it may be None then.
+        match (dict): The near-duplicate found by DedupIndex.query, or None.
+        transcript (Transcript): The transcript being processed.
+        results (dict): Where to record the result, or None.
+
+    Yields:
+        str: The next piece of the result.
+    """
+    if match is not None and kind in match["results"]:
+        result = match["results"][kind].replace(
+            match["title"], transcript.metadata.title
+        )
+        if results is not None:
+            results[kind] = result
+        yield result
+        return
+
+    if results is None:
+        yield from run()
+        return
+
+    pieces = []
+    for piece in run():
+        pieces.append(piece)
+        yield piece
+    results[kind] = "".join(pieces)
+
+
+def _load(url: str, cache_dir: str = None) -> Iterator[Transcript]:
+    """
+    Loads the transcript of a YouTube video, or lazily loads the transcripts
+    of local caption files.
+
+    Args:
+        url (str): A YouTube URL, or a caption file, directory or glob pattern.
+        cache_dir (str): Directory where fetched transcripts are cached.
+
+    Returns:
+        Iterator[Transcript]: The transcripts to process.
+    """
+    if _is_video(url):
+        return iter([Transcript.get_transcript(url, cache_dir=cache_dir)])
+
+    return Transcript.from_files(url, on_error=_skip)
+
+
+def _is_video(url: str) -> bool:
+    """Returns whether the input is a single video URL rather than files."""
+    return Transcript.check_url(url) or "://" in url
+
+
+def _index_path(index: str, url: str, transcript: Transcript) -> str:
+    """
+    Returns the path of the transcript index of a video.
+
+    A single video uses --index as its index file. Local caption files may
+    hold many videos, so --index is then a directory in which each video
+    has its own index, named after a hash of its URL.
+
+    Args:
+        index (str): The --index option, or None.
+        url (str): The --url option.
+        transcript (Transcript): The transcript of the video.
+
+    Returns:
+        str: The path of the index, or None if no index is saved.
+    """
+    if index is None or _is_video(url):
+        return index
+
+    os.makedirs(index, exist_ok=True)
+    key = hashlib.sha256(transcript.metadata.url.encode("utf-8")).hexdigest()[:16]
+
+    return os.path.join(index, f"{key}.npz")
+
+
+def _output_path(transcript: Transcript) -> str:
+    """Returns the file --write writes the output of a transcript to."""
+    return f"{slugify.slugify(transcript.metadata.title)}.md"
+
+
+def _unwritten(transcripts: Iterable[Transcript]) -> Iterator[Transcript]:
+    """
+    Skips the transcripts whose output file already exists, before any work
+    is done for them, so that re-running a partly written batch only
+    processes the rest.
+
+    Args:
+        transcripts (Iterable[Transcript]): The transcripts to process.
+
+    Yields:
+        Transcript: The next transcript without an output file.
+    """
+    for transcript in transcripts:
+        filename = _output_path(transcript)
+        if os.path.isfile(filename):
+            _skip(
+                transcript.metadata.url, FileExistsError(f"{filename} already exists")
+            )
+            continue
+        yield transcript
+
+
+def _skip(path: str, error: Exception) -> None:
+    """Reports a caption file that could not be loaded and is skipped."""
+    click.echo(f"Skipping {path}: {error}", err=True)
+
+
+def _write(pieces: Iterable[str], file: IO[str] = None) -> None:
+    """
+    Writes each piece of output as soon as it is produced, so the output is
+    never held in memory as a whole.
+
+    Args:
+        pieces (Iterable[str]): The pieces of output to write.
+        file (IO[str]): Where to write. Defaults to None, which is stdout.
+
+    Returns:
+        None
+    """
+    for piece in pieces:
+        click.echo(piece, file=file, nl=False)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,259 @@
+import collections
+import json
+import os
+import re
+import zlib
+
+import numpy as np
+
+_PRIME = 4294967311  # The smallest prime above 2**32.
+
+
+class MinHasher:
+    """Computes MinHash signatures of the word shingles of a text."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        """Initializes an instance of the MinHasher class.
+
+        Args:
+            num_perm (int): The number of hash functions, and so the length
+                of each signature. Defaults to 128.
+            shingle_size (int): The number of words per shingle. Defaults to 5.
+            seed (int): Seeds the hash functions. Signatures are only
+                comparable between hashers with the same settings.
+                Defaults to 1.
+
+        Returns:
+            None
+        """
+        if num_perm < 1:
+            raise ValueError("num_perm must be positive.")
+        if shingle_size < 1:
+            raise ValueError("shingle_size must be positive.")
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        generator = np.random.default_rng(seed)
+        self._a = generator.integers(1, 2**31, size=(num_perm, 1), dtype=np.uint64)
+        self._b = generator.integers(0, 2**31, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, text: str, block_size: int = 4096) -> np.ndarray:
+        """
+        Returns the MinHash signature of the given text.
+
+        Args:
+            text (str): The text to sign.
+            block_size (int): How many shingles to hash at a time, which
+                bounds memory use for long transcripts. Defaults to 4096.
+
+        Returns:
+            np.ndarray: The signature, num_perm unsigned integers.
+        """
+        shingles = self._shingles(text)
+        signature = np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        for start in range(0, len(shingles), block_size):
+            block = shingles[start : start + block_size][np.newaxis, :]
+            hashes = (self._a * block + self._b) % _PRIME
+            np.minimum(signature, hashes.min(axis=1), out=signature)
+
+        return signature
+
+    def _shingles(self, text: str) -> np.ndarray:
+        """Returns the distinct 32-bit hashes of the word shingles of text."""
+        words = re.findall(r"\w+", text.lower())
+        size = min(self.shingle_size, len(words)) or 1
+        hashes = {
+            zlib.crc32(" ".join(words[i : i + size]).encode("utf-8"))
+            for i in range(len(words) - size + 1)
+        }
+
+        return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimates the Jaccard similarity of two texts from their signatures."""
+    return float(np.mean(first == second))
+
+
+class DedupIndex:
+    """
+    A locality-sensitive hashing index of transcript signatures, used to find
+    near-duplicate videos and reuse their results.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        threshold: float = 0.8,
+        hasher: MinHasher = None,
+    ) -> None:
+        """Initializes an instance of the DedupIndex class.
+
+        Args:
+            path (str): Where the index is saved. Defaults to None, which
+                keeps the index in memory only.
+            threshold (float): The estimated Jaccard similarity above which
+                two transcripts are duplicates. Defaults to 0.8.
+            hasher (MinHasher): The hasher used for signatures. Defaults to a
+                MinHasher with default settings.
+
+        Returns:
+            None
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1].")
+        self.path = path
+        self.threshold = threshold
+        self.hasher = hasher or MinHasher()
+        self.bands, self.rows = self._bands(self.hasher.num_perm, threshold)
+        self.entries = {}
+        self._buckets = collections.defaultdict(set)
+
+    @classmethod
+    def open(cls, path: str, threshold: float = 0.8) -> "DedupIndex":
+        """
+        Loads the index saved at path, or creates an empty one there.
+
+        Args:
+            path (str): The index file.
+            threshold (float): The similarity threshold. Defaults to 0.8.
+
+        Returns:
+            DedupIndex: The index.
+        """
+        if not os.path.isfile(path):
+            return cls(path, threshold=threshold)
+
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        hasher = MinHasher(
+            num_perm=data["num_perm"],
+            shingle_size=data["shingle_size"],
+            seed=data["seed"],
+        )
+        index = cls(path, threshold=threshold, hasher=hasher)
+        for key, entry in data["entries"].items():
+            index._insert(
+                key,
+                np.array(entry["signature"], dtype=np.uint64),
+                entry["title"],
+                entry["results"],
+            )
+
+        return index
+
+    def save(self) -> None:
+        """Writes the index to its path."""
+        data = {
+            "num_perm": self.hasher.num_perm,
+            "shingle_size": self.hasher.shingle_size,
+            "seed": self.hasher.seed,
+            "entries": {
+                key: {
+                    "signature": entry["signature"].tolist(),
+                    "title": entry["title"],
+                    "results": entry["results"],
+                }
+                for key, entry in self.entries.items()
+            },
+        }
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(temporary, self.path)
+
+    def query(self, text: str) -> dict:
+        """
+        Finds the most similar indexed transcript above the threshold.
+
+        Only transcripts sharing an LSH band with the text are compared, so
+        lookups do not scan the whole index.
+
+        Args:
+            text (str): The transcript to look up.
+
+        Returns:
+            dict: The matching entry, with its "key", "title", "results" and
+                "similarity", or None if there is no match.
+        """
+        signature = self.hasher.signature(text)
+        candidates = set()
+        for band in self._band_keys(signature):
+            candidates |= self._buckets.get(band, set())
+
+        best = None
+        for key in candidates:
+            entry = self.entries[key]
+            score = similarity(signature, entry["signature"])
+            if score >= self.threshold and (best is None or score > best[0]):
+                best = (score, key)
+        if best is None:
+            return None
+
+        entry = self.entries[best[1]]
+        return {
+            "key": best[1],
+            "title": entry["title"],
+            "results": entry["results"],
+            "similarity": best[0],
+        }
+
+    def add(self, key: str, text: str, title: str, results: dict) -> None:
+        """
+        Indexes a transcript and the results generated from it.
+
+        Args:
+            key (str): Identifies the video, e.g. its URL.
+            text (str): The transcript.
+            title (str): The title of the video.
+            results (dict): The generated outputs, e.g. {"article": ...}.
+
+        Returns:
+            None
+        """
+        if key in self.entries:
+            self._remove(key)
+        self._insert(key, self.hasher.signature(text), title, results)
+
+    def _insert(
+        self, key: str, signature: np.ndarray, title: str, results: dict
+    ) -> None:
+        """Adds an entry and its LSH bands."""
+        self.entries[key] = {"signature": signature, "title": title, "results": results}
+        for band in self._band_keys(signature):
+            self._buckets[band].add(key)
+
+    def _remove(self, key: str) -> None:
+        """Removes an entry and its LSH bands."""
+        entry = self.entries.pop(key)
+        for band in self._band_keys(entry["signature"]):
+            self._buckets[band].discard(key)
+
+    def _band_keys(self, signature: np.ndarray) -> list:
+        """Returns the bucket key of each band of the signature."""
+        return [
+            (band, signature[band * self.rows : (band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def _bands(num_perm: int, threshold: float) -> tuple:
+        """
+        Chooses the number of bands and rows per band whose LSH threshold,
+        (1 / bands) ** (1 / rows), is closest to the similarity threshold
+        without exceeding it, so that few true duplicates are missed.
+        """
+        options = [
+            (bands, num_perm // bands)
+            for bands in range(1, num_perm + 1)
+            if num_perm % bands == 0
+        ]
+        below = [
+            option
+            for option in options
+            if (1 / option[0]) ** (1 / option[1]) <= threshold
+        ]
+
+        return max(
+            below or options, key=lambda option: (1 / option[0]) ** (1 / option[1])
+        )
@@ -0,0 +1,196 @@
+import collections
+import queue
+import threading
+import time
+from typing import Callable, Iterable
+
+from attrs import define
+
+
+@define
+class HedgeStats:
+    """Counts what happened to the requests run by a Hedger."""
+
+    requests: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    timeouts: int = 0
+
+    def print(self) -> str:
+        """Prints the hedging statistics."""
+        rate = self.hedged / self.requests if self.requests else 0.0
+        return (
+            f"Requests: {self.requests}\n"
+            f"Hedged: {self.hedged} ({rate:.0%})\n"
+            f"Hedge Wins: {self.hedge_wins}\n"
+            f"Timeouts: {self.timeouts}\n"
+        )
+
+
+class Hedger:
+    """
+    Runs streaming requests with a deadline, issuing a duplicate request when
+    the first one is slow to produce its first token.
+
+    The losing attempt is cancelled, but its thread can only notice between
+    tokens: an attempt stuck before its first token keeps its thread and
+    connection until its stream ends or times out. Streams should therefore
+    be bounded by a request timeout, as AI does for every hedged request.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_samples: int = 3,
+        window: int = 100,
+        hedge: bool = True,
+    ) -> None:
+        """Initializes an instance of the Hedger class.
+
+        Args:
+            percentile (float): The percentile of observed time to first
+                token after which a duplicate request is issued.
+                Defaults to 95.0.
+            min_samples (int): How many first tokens must have been observed
+                before requests are hedged. Defaults to 3.
+            window (int): How many recent observations the percentile is
+                computed over. Defaults to 100.
+            hedge (bool): Whether to issue duplicate requests at all.
+                Defaults to True.
+
+        Returns:
+            None
+        """
+        if not 0 < percentile <= 100:
+            raise ValueError("percentile must be in (0, 100].")
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.hedge = hedge
+        self.stats = HedgeStats()
+        self._samples = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def hedge_delay(self) -> float:
+        """
+        Returns how long to wait for a first token before hedging, or None if
+        hedging is disabled or too few first tokens have been observed.
+        """
+        with self._lock:
+            if not self.hedge or len(self._samples) < self.min_samples:
+                return None
+            samples = sorted(self._samples)
+
+        rank = round(self.percentile / 100 * (len(samples) - 1))
+        return samples[rank]
+
+    def run(self, stream: Callable[[], Iterable[str]], timeout: float = None) -> str:
+        """
+        Runs a streaming request to completion and returns its text.
+
+        Args:
+            stream (Callable[[], Iterable[str]]): Starts the request and
+                returns its token stream. Called again to issue a hedge.
+            timeout (float): The number of seconds after which the request
+                is abandoned. Defaults to None, which waits indefinitely.
+
+        Raises:
+            TimeoutError: If no attempt completed within the timeout.
+
+        Returns:
+            str: The text of the first attempt to complete.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = queue.Queue()
+        attempts = [self._start(stream, done, 0)]
+        with self._lock:
+            self.stats.requests += 1
+
+        delay = self.hedge_delay()
+        if delay is not None:
+            _, first_token = attempts[0]
+            if not first_token.wait(self._remaining(deadline, delay)):
+                if done.empty() and self._remaining(deadline) != 0:
+                    attempts.append(self._start(stream, done, 1))
+                    with self._lock:
+                        self.stats.hedged += 1
+
+        pending = len(attempts)
+        error = None
+        while pending:
+            try:
+                index, text, exception = done.get(timeout=self._remaining(deadline))
+            except queue.Empty:
+                break
+            pending -= 1
+            if exception is not None:
+                error = exception
+                continue
+
+            for cancel, _ in attempts:
+                cancel.set()
+            if index > 0:
+                with self._lock:
+                    self.stats.hedge_wins += 1
+            return text
+
+        for cancel, _ in attempts:
+            cancel.set()
+        if error is not None and not pending:
+            raise error
+        with self._lock:
+            self.stats.timeouts += 1
+        raise TimeoutError(f"Request did not complete within {timeout} seconds.")
+
+    def _start(
+        self, stream: Callable[[], Iterable[str]], done: queue.Queue, index: int
+    ) -> tuple:
+        """Starts an attempt on a daemon thread, so that a stuck request
+        never keeps the process alive."""
+        cancel = threading.Event()
+        first_token = threading.Event()
+        threading.Thread(
+            target=self._attempt,
+            args=(stream, done, index, cancel, first_token),
+            daemon=True,
+        ).start()
+
+        return cancel, first_token
+
+    def _attempt(
+        self,
+        stream: Callable[[], Iterable[str]],
+        done: queue.Queue,
+        index: int,
+        cancel: threading.Event,
+        first_token: threading.Event,
+    ) -> None:
+        """Consumes one attempt's token stream, stopping early once cancelled."""
+        started = time.monotonic()
+        tokens = []
+        iterator = None
+        try:
+            iterator = iter(stream())
+            for token in iterator:
+                if cancel.is_set():
+                    return
+                if not first_token.is_set():
+                    first_token.set()
+                    with self._lock:
+                        self._samples.append(time.monotonic() - started)
+                tokens.append(token)
+            done.put((index, "".join(tokens), None))
+        except Exception as exception:
+            done.put((index, None, exception))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    @staticmethod
+    def _remaining(deadline: float, cap: float = None) -> float:
+        """Returns the seconds left until the deadline, at most cap."""
+        if deadline is None:
+            return cap
+        remaining = max(0.0, deadline - time.monotonic())
+
+        return remaining if cap is None else min(remaining, cap)
@@ -0,0 +1,234 @@
+import hashlib
+import os
+import re
+import zlib
+
+import numpy as np
+
+
+class HashedNgramEmbedder:
+    """
+    Embeds text as a hashed bag of character n-grams so that an index can be
+    built and queried entirely offline.
+    """
+
+    def __init__(self, dim: int = 2048, ngram: int = 3) -> None:
+        """Initializes an instance of the HashedNgramEmbedder class.
+
+        Args:
+            dim (int): The number of dimensions of each vector.
+                Defaults to 2048.
+            ngram (int): The length of the character n-grams. Defaults to 3.
+
+        Returns:
+            None
+        """
+        if dim < 1:
+            raise ValueError("dim must be positive.")
+        if ngram < 1:
+            raise ValueError("ngram must be positive.")
+        self.dim = dim
+        self.ngram = ngram
+
+    def embed(self, texts: list) -> np.ndarray:
+        """Embeds each text as an L2-normalized row vector.
+
+        Args:
+            texts (list): The texts to embed.
+
+        Returns:
+            np.ndarray: A (len(texts), dim) array of float32 vectors.
+        """
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            buckets = [
+                zlib.crc32(gram.encode("utf-8")) % self.dim
+                for gram in self._ngrams(text)
+            ]
+            if not buckets:
+                continue
+            counts = np.bincount(buckets, minlength=self.dim)
+            vectors[row] = np.log1p(counts)
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+        return vectors
+
+    def _ngrams(self, text: str) -> list:
+        """Returns the word and character n-grams of the given text."""
+        words = re.findall(r"\w+", text.lower())
+        grams = list(words)
+        for word in words:
+            padded = f" {word} "
+            grams.extend(
+                padded[i : i + self.ngram]
+                for i in range(max(1, len(padded) - self.ngram + 1))
+            )
+
+        return grams
+
+
+class VectorIndex:
+    """A dense vector index over transcript chunks."""
+
+    def __init__(
+        self,
+        chunks: list,
+        vectors: np.ndarray,
+        embedder: HashedNgramEmbedder,
+        fingerprint: str = "",
+    ) -> None:
+        """Initializes an instance of the VectorIndex class.
+
+        Args:
+            chunks (list): The indexed transcript chunks.
+            vectors (np.ndarray): One embedding row per chunk.
+            embedder (HashedNgramEmbedder): The embedder used for queries.
+            fingerprint (str): A hash of the source transcript and of how
+                it was chunked and embedded, used to detect a stale index
+                on disk.
+
+        Returns:
+            None
+        """
+        if len(chunks) != len(vectors):
+            raise ValueError("chunks and vectors must have the same length.")
+        self.chunks = list(chunks)
+        self.vectors = vectors
+        self.embedder = embedder
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(
+        cls, chunks: list, embedder: HashedNgramEmbedder = None, fingerprint: str = ""
+    ) -> "VectorIndex":
+        """
+        Builds an index by embedding each chunk.
+
+        Args:
+            chunks (list): The transcript chunks to index.
+            embedder (HashedNgramEmbedder): The embedder to use. Defaults to a
+                HashedNgramEmbedder with default settings.
+            fingerprint (str): A hash of the source transcript.
+
+        Returns:
+            VectorIndex: The built index.
+        """
+        embedder = embedder or HashedNgramEmbedder()
+
+        return cls(chunks, embedder.embed(chunks), embedder, fingerprint)
+
+    def search(self, query: str, k: int = 4) -> list:
+        """
+        Returns the k chunks most similar to the query, in transcript order.
+
+        Args:
+            query (str): The text to search for.
+            k (int): The maximum number of chunks to return. Defaults to 4.
+
+        Returns:
+            list: The matching chunks.
+        """
+        if k < 1:
+            raise ValueError("k must be positive.")
+        if not self.chunks:
+            return []
+
+        scores = self.vectors @ self.embedder.embed([query])[0]
+        k = min(k, len(self.chunks))
+        top = np.argpartition(-scores, k - 1)[:k]
+
+        return [self.chunks[i] for i in sorted(top)]
+
+    def save(self, path: str) -> None:
+        """
+        Persists the index to a NumPy .npz file.
+
+        Args:
+            path (str): The file to write.
+
+        Returns:
+            None
+        """
+        with open(path, "wb") as file:
+            np.savez_compressed(
+                file,
+                chunks=np.array(self.chunks, dtype=str),
+                vectors=self.vectors,
+                dim=self.embedder.dim,
+                ngram=self.embedder.ngram,
+                fingerprint=self.fingerprint,
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "VectorIndex":
+        """
+        Loads an index previously written by save().
+
+        Args:
+            path (str): The file to read.
+
+        Returns:
+            VectorIndex: The loaded index.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            embedder = HashedNgramEmbedder(
+                dim=int(data["dim"]), ngram=int(data["ngram"])
+            )
+            return cls(
+                chunks=data["chunks"].tolist(),
+                vectors=data["vectors"],
+                embedder=embedder,
+                fingerprint=str(data["fingerprint"]),
+            )
+
+    @staticmethod
+    def fingerprint_of(text: str, *settings) -> str:
+        """Returns a stable hash identifying the given transcript text and
+        the settings it was chunked and embedded with."""
+        digest = hashlib.sha256(text.encode("utf-8"))
+        for setting in settings:
+            digest.update(f"\0{setting}".encode("utf-8"))
+
+        return digest.hexdigest()
+
+    @classmethod
+    def open(
+        cls,
+        path: str,
+        chunks_factory,
+        text: str,
+        chunking: str = "",
+        embedder: HashedNgramEmbedder = None,
+    ) -> "VectorIndex":
+        """
+        Loads the index at path if it was built from the same transcript
+        with the same chunking and embedder settings, otherwise builds a
+        fresh index and persists it there.
+
+        Args:
+            path (str): The index file. If None, the index is not persisted.
+            chunks_factory (callable): Returns the chunks to index when the
+                index has to be (re)built.
+            text (str): The transcript the index belongs to.
+            chunking (str): Identifies how chunks_factory splits the text,
+                e.g. the chunker version and chunk size. Defaults to "".
+            embedder (HashedNgramEmbedder): The embedder to use. Defaults to a
+                HashedNgramEmbedder with default settings.
+
+        Returns:
+            VectorIndex: The loaded or built index.
+        """
+        embedder = embedder or HashedNgramEmbedder()
+        fingerprint = cls.fingerprint_of(text, chunking, embedder.dim, embedder.ngram)
+        if path and os.path.isfile(path):
+            index = cls.load(path)
+            if index.fingerprint == fingerprint:
+                return index
+
+        index = cls.build(chunks_factory(), embedder, fingerprint=fingerprint)
+        if path:
+            index.save(path)
+
+        return index
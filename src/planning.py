@@ -0,0 +1,405 @@
+import math
+from typing import Callable
+
+from attrs import field, frozen
+
+from src.ai import summary_messages, takeaways_messages
+from src.cache import ResultCache
+from src.chunking import (
+    count_tokens,
+    expected_chunk_size,
+    group_sizes,
+    iter_content_chunks,
+)
+from src.transcript import Transcript
+
+# USD per 1,000 tokens for the default chat model, gpt-3.5-turbo-16k.
+INPUT_PRICE = 0.003
+OUTPUT_PRICE = 0.004
+
+# Tokens of instructions sent with every request, besides the title.
+PROMPT_TOKENS = 60
+MAX_OUTPUT_TOKENS = 4096
+
+# Response length relative to the request's content, by stage.
+OUTPUT_RATIOS = {"draft": 0.5, "merge": 0.6, "takeaways": 0.1}
+ASK_OUTPUT_TOKENS = 300
+
+TIME_TO_FIRST_TOKEN = 1.0
+OUTPUT_TOKENS_PER_SECOND = 60.0
+
+
+@frozen
+class StageEstimate:
+    """The estimated requests, tokens and time of one stage of a run."""
+
+    requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    seconds: float = 0.0
+    latency: float = 0.0
+
+    def __add__(self, other: "StageEstimate") -> "StageEstimate":
+        """Sums two estimates, e.g. of the same stage for different videos."""
+        return StageEstimate(
+            requests=self.requests + other.requests,
+            input_tokens=self.input_tokens + other.input_tokens,
+            output_tokens=self.output_tokens + other.output_tokens,
+            seconds=self.seconds + other.seconds,
+            latency=self.latency + other.latency,
+        )
+
+    @property
+    def cost(self) -> float:
+        """The estimated cost in USD."""
+        return (
+            self.input_tokens / 1000 * INPUT_PRICE
+            + self.output_tokens / 1000 * OUTPUT_PRICE
+        )
+
+
+@frozen
+class VideoPlan:
+    """The estimated work of processing one video."""
+
+    title: str
+    tokens: int
+    chunks: int
+    stages: dict = field(factory=dict)
+    cached: int = 0
+
+    @property
+    def total(self) -> StageEstimate:
+        """The estimate summed over all stages."""
+        return sum(self.stages.values(), StageEstimate())
+
+
+@frozen
+class Plan:
+    """The estimated work, cost and wall time of a run over many videos."""
+
+    videos: list
+    workers: int
+    requests_per_minute: int
+    tokens_per_minute: int
+    schedule: bool = False
+
+    @property
+    def stages(self) -> dict:
+        """The estimate of each stage, summed over all videos."""
+        stages = {}
+        for video in self.videos:
+            for name, estimate in video.stages.items():
+                stages[name] = stages.get(name, StageEstimate()) + estimate
+
+        return stages
+
+    @property
+    def total(self) -> StageEstimate:
+        """The estimate summed over all videos and stages."""
+        return sum((video.total for video in self.videos), StageEstimate())
+
+    @property
+    def wall_time(self) -> float:
+        """
+        The estimated wall time in seconds.
+
+        Videos run one after another unless scheduled concurrently, and the
+        run can never be faster than the rate limits allow.
+        """
+        total = self.total
+        if self.schedule:
+            busy = total.seconds / self.workers
+            critical = max((video.total.latency for video in self.videos), default=0)
+            work = max(busy, critical)
+        else:
+            work = total.latency
+
+        return max(
+            work,
+            total.requests / self.requests_per_minute * 60,
+            (total.input_tokens + total.output_tokens) / self.tokens_per_minute * 60,
+        )
+
+    def print(self) -> str:
+        """Prints the plan as plain-text tables."""
+        lines = [
+            f"{'Video':<40} {'Tokens':>9} {'Chunks':>6} {'Requests':>8} "
+            f"{'Input':>10} {'Output':>9} {'Cost':>9} {'Time':>9}"
+        ]
+        for video in self.videos:
+            total = video.total
+            lines.append(
+                f"{video.title[:40]:<40} {video.tokens:>9} {video.chunks:>6} "
+                f"{total.requests:>8} {total.input_tokens:>10} "
+                f"{total.output_tokens:>9} {f'${total.cost:.2f}':>9} "
+                f"{_duration(total.latency):>9}"
+            )
+
+        lines.append("")
+        lines.append(
+            f"{'Stage':<40} {'Requests':>8} {'Input':>10} {'Output':>9} {'Cost':>9}"
+        )
+        for name, estimate in self.stages.items():
+            lines.append(
+                f"{name:<40} {estimate.requests:>8} {estimate.input_tokens:>10} "
+                f"{estimate.output_tokens:>9} {f'${estimate.cost:.2f}':>9}"
+            )
+
+        total = self.total
+        lines.append("")
+        lines.append(f"Videos: {len(self.videos)}")
+        lines.append(f"Chunks: {sum(video.chunks for video in self.videos)}")
+        cached = sum(video.cached for video in self.videos)
+        if cached:
+            lines.append(f"Cached Chunk Requests: {cached}")
+        lines.append(f"Requests: {total.requests}")
+        lines.append(f"Input Tokens: {total.input_tokens}")
+        lines.append(f"Output Tokens: {total.output_tokens}")
+        lines.append(f"Estimated Cost: ${total.cost:.2f}")
+        lines.append(
+            f"Estimated Wall Time: {_duration(self.wall_time)} "
+            f"({self.workers} workers, {self.requests_per_minute} RPM, "
+            f"{self.tokens_per_minute} TPM)"
+        )
+
+        return "\n".join(lines) + "\n"
+
+
+class Planner:
+    """
+    Predicts the requests, tokens, cost and time of a run from transcripts
+    alone, without calling the model.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 10000,
+        fan_in: int = 4,
+        merge_context_size: int = 12000,
+        ask_chunk_size: int = 1000,
+        workers: int = 4,
+        cache: ResultCache = None,
+    ) -> None:
+        """Initializes an instance of the Planner class.
+
+        Args:
+            chunk_size (int): The maximum number of tokens per transcript
+                chunk. Defaults to 10000.
+            fan_in (int): The maximum number of drafts merged per request.
+                Defaults to 4.
+            merge_context_size (int): The maximum number of tokens merged per
+                request. Defaults to 12000.
+            ask_chunk_size (int): The number of tokens per chunk retrieved
+                to answer a question. Defaults to 1000.
+            workers (int): The number of merge requests run in parallel.
+                Defaults to 4.
+            cache (ResultCache): The responses of the chunk requests that
+                will not be sent again. Defaults to None.
+
+        Returns:
+            None
+        """
+        self.chunk_size = chunk_size
+        self.fan_in = fan_in
+        self.merge_context_size = merge_context_size
+        self.ask_chunk_size = ask_chunk_size
+        self.workers = workers
+        self.cache = cache
+
+    def plan_video(
+        self, transcript: Transcript, kinds: list, schedule: bool = False
+    ) -> VideoPlan:
+        """
+        Estimates the work of processing one video.
+
+        The transcript is tokenized once and assumed to split into chunks
+        of the expected content-defined chunk size (see
+        expected_chunk_size). With a cache, it is split into its actual
+        chunks instead, and the chunk requests whose responses are cached
+        are left out.
+
+        Args:
+            transcript (Transcript): The transcript of the video.
+            kinds (list): The outputs to produce: "article", "takeaways"
+                and/or "ask".
+            schedule (bool): Whether the chunks are processed concurrently
+                by the scheduler's workers rather than one after another.
+                Defaults to False.
+
+        Returns:
+            VideoPlan: The estimated work.
+        """
+        tokens = count_tokens(transcript.content)
+        if self.cache is None:
+            average = max(1, round(expected_chunk_size(self.chunk_size)))
+            full, remainder = divmod(tokens, average)
+            chunks = [average] * full + ([remainder] if remainder else [])
+            texts = [None] * len(chunks)
+        else:
+            texts = list(
+                iter_content_chunks(transcript.content, chunk_size=self.chunk_size)
+            )
+            chunks = [count_tokens(text) for text in texts]
+        overhead = PROMPT_TOKENS + count_tokens(transcript.metadata.title)
+
+        title = transcript.metadata.title
+        run = self._level if schedule else _sequential
+        stages = {}
+        cached = 0
+        if "article" in kinds:
+            drafts = self._requests(chunks, "draft", overhead)
+            sent = self._uncached(drafts, texts, title, summary_messages)
+            cached += len(drafts) - len(sent)
+            stages["article (draft)"] = run(sent)
+            stages["article (merge)"] = self._merges(drafts, overhead)
+        if "takeaways" in kinds:
+            requests = self._requests(chunks, "takeaways", overhead)
+            sent = self._uncached(requests, texts, title, takeaways_messages)
+            cached += len(requests) - len(sent)
+            stages["takeaways"] = run(sent)
+        if "ask" in kinds:
+            context = min(tokens, 4 * self.ask_chunk_size)
+            stages["ask"] = _sequential([(context + overhead, ASK_OUTPUT_TOKENS)])
+
+        return VideoPlan(
+            title=title,
+            tokens=tokens,
+            chunks=len(chunks),
+            stages=stages,
+            cached=cached,
+        )
+
+    def plan(
+        self,
+        transcripts,
+        kinds: list,
+        requests_per_minute: int = 3500,
+        tokens_per_minute: int = 60000,
+        schedule: bool = False,
+    ) -> Plan:
+        """
+        Estimates the work of processing many videos.
+
+        Args:
+            transcripts (Iterable[Transcript]): The transcripts to plan for.
+            kinds (list): The outputs to produce.
+            requests_per_minute (int): The API's request rate limit.
+                Defaults to 3500.
+            tokens_per_minute (int): The API's token rate limit.
+                Defaults to 60000.
+            schedule (bool): Whether the videos are processed concurrently.
+                Defaults to False.
+
+        Returns:
+            Plan: The estimated work, cost and wall time.
+        """
+        return Plan(
+            videos=[
+                self.plan_video(transcript, kinds, schedule=schedule)
+                for transcript in transcripts
+            ],
+            workers=self.workers,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            schedule=schedule,
+        )
+
+    @staticmethod
+    def _requests(sizes: list, stage: str, overhead: int) -> list:
+        """Returns the (input, output) tokens of one request per content size."""
+        return [
+            (
+                size + overhead,
+                min(MAX_OUTPUT_TOKENS, math.ceil(size * OUTPUT_RATIOS[stage])),
+            )
+            for size in sizes
+        ]
+
+    def _uncached(
+        self,
+        requests: list,
+        texts: list,
+        title: str,
+        build_messages: Callable[[str, str], list],
+    ) -> list:
+        """Returns the chunk requests whose responses are not cached."""
+        if self.cache is None:
+            return requests
+
+        return [
+            request
+            for request, text in zip(requests, texts)
+            if self.cache.key(build_messages(title, text)) not in self.cache
+        ]
+
+    def _merges(self, drafts: list, overhead: int) -> StageEstimate:
+        """Simulates the tree reduce of the drafts the way AI._reduce runs it."""
+        estimate = StageEstimate()
+        sizes = [output for _, output in drafts]
+        if len(sizes) <= 1:
+            return estimate
+
+        groups = group_sizes(sizes, self.fan_in, self.merge_context_size)
+        while len(groups) > 1:
+            merged = [sum(sizes[i] for i in group) for group in groups]
+            requests = self._requests(
+                [size for size, group in zip(merged, groups) if len(group) > 1],
+                "merge",
+                overhead,
+            )
+            estimate += self._level(requests)
+            outputs = iter(output for _, output in requests)
+            sizes = [
+                next(outputs) if len(group) > 1 else size
+                for size, group in zip(merged, groups)
+            ]
+            groups = group_sizes(sizes, self.fan_in, self.merge_context_size)
+
+        if len(groups[0]) > 1:
+            final = sum(sizes[i] for i in groups[0])
+            estimate += self._level(self._requests([final], "merge", overhead))
+
+        return estimate
+
+    def _level(self, requests: list) -> StageEstimate:
+        """Estimates requests run in parallel by the workers, such as one
+        level of merges or the chunks of a scheduled video."""
+        level = _sequential(requests)
+        slowest = max((_duration_of(*request) for request in requests), default=0.0)
+
+        return StageEstimate(
+            requests=level.requests,
+            input_tokens=level.input_tokens,
+            output_tokens=level.output_tokens,
+            seconds=level.seconds,
+            latency=math.ceil(len(requests) / self.workers) * slowest,
+        )
+
+
+def _duration_of(input_tokens: int, output_tokens: int) -> float:
+    """Returns the estimated seconds a single request takes."""
+    return TIME_TO_FIRST_TOKEN + output_tokens / OUTPUT_TOKENS_PER_SECOND
+
+
+def _sequential(requests: list) -> StageEstimate:
+    """Estimates requests that are sent one after another."""
+    seconds = sum(_duration_of(*request) for request in requests)
+
+    return StageEstimate(
+        requests=len(requests),
+        input_tokens=sum(input_tokens for input_tokens, _ in requests),
+        output_tokens=sum(output_tokens for _, output_tokens in requests),
+        seconds=seconds,
+        latency=seconds,
+    )
+
+
+def _duration(seconds: float) -> str:
+    """Formats seconds as a short human-readable duration."""
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.1f}m"
+
+    return f"{seconds / 3600:.1f}h"
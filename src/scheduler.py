@@ -0,0 +1,233 @@
+import heapq
+import itertools
+import statistics
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterator
+
+from attrs import define, field
+
+
+@define(eq=False)
+class Job:
+    """A unit of batch work made of chunks that can be processed independently."""
+
+    name: str
+    chunks: list
+    costs: list
+    priority: int = 0
+    payload: Any = None
+    submitted: float = field(factory=time.monotonic)
+    started: float = None
+    finished: float = None
+    results: list = field(factory=list)
+    _next: int = 0
+    _pending: int = 0
+
+    @property
+    def cost(self) -> int:
+        """The estimated cost of the chunks not yet dispatched."""
+        return sum(self.costs[self._next :])
+
+    @property
+    def queue_wait(self) -> float:
+        """Seconds between submission and the first chunk being dispatched."""
+        return None if self.started is None else self.started - self.submitted
+
+    @property
+    def completion_time(self) -> float:
+        """Seconds between submission and the job completing."""
+        return None if self.finished is None else self.finished - self.submitted
+
+
+@define
+class ScheduleReport:
+    """Queue wait and completion time percentiles of a scheduler run."""
+
+    jobs: int
+    queue_wait: dict
+    completion_time: dict
+
+    def print(self) -> str:
+        """Prints the scheduling report."""
+        lines = [f"Jobs: {self.jobs}"]
+        for label, values in [
+            ("Queue Wait", self.queue_wait),
+            ("Completion Time", self.completion_time),
+        ]:
+            lines.append(
+                f"{label}: "
+                + ", ".join(f"{key} {value:.2f}s" for key, value in values.items())
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+class Scheduler:
+    """
+    Runs the chunks of many jobs on a pool of workers, shortest job first.
+
+    Each job is keyed by a virtual deadline: the time it was last queued
+    plus its remaining estimated cost, weighted by its priority, times the
+    aging rate. Small jobs therefore start first, but a large job's deadline
+    eventually precedes those of jobs queued after it, so it cannot starve.
+    Jobs are re-queued after every chunk, which interleaves the chunks of
+    different jobs instead of running each job to completion.
+    """
+
+    def __init__(self, workers: int = 4, aging: float = 0.001) -> None:
+        """Initializes an instance of the Scheduler class.
+
+        Args:
+            workers (int): The number of chunks processed in parallel.
+                Defaults to 4.
+            aging (float): Seconds of queueing that offset one unit of
+                estimated cost, e.g. one token. Defaults to 0.001.
+
+        Returns:
+            None
+        """
+        if workers < 1:
+            raise ValueError("workers must be positive.")
+        if aging <= 0:
+            raise ValueError("aging must be positive.")
+        self.workers = workers
+        self.aging = aging
+        self.jobs = []
+        self._queue = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        name: str,
+        chunks: list,
+        costs: list = None,
+        priority: int = 0,
+        payload: Any = None,
+    ) -> Job:
+        """
+        Queues a job.
+
+        Args:
+            name (str): Identifies the job in reports.
+            chunks (list): The chunks to process.
+            costs (list): The estimated cost of each chunk, e.g. its token
+                count. Defaults to the length of each chunk.
+            priority (int): Each step of priority halves the job's effective
+                cost. Defaults to 0.
+            payload (Any): Arbitrary data for the callbacks. Defaults to None.
+
+        Returns:
+            Job: The queued job.
+        """
+        if not chunks:
+            raise ValueError("chunks must not be empty.")
+        costs = [len(chunk) for chunk in chunks] if costs is None else list(costs)
+        if len(costs) != len(chunks):
+            raise ValueError("costs must have one entry per chunk.")
+
+        job = Job(
+            name=name,
+            chunks=list(chunks),
+            costs=costs,
+            priority=priority,
+            payload=payload,
+            results=[None] * len(chunks),
+        )
+        with self._lock:
+            self.jobs.append(job)
+            self._push(job)
+
+        return job
+
+    def run(
+        self,
+        process: Callable[[Job, Any], Any],
+        on_complete: Callable[[Job], None] = None,
+    ) -> Iterator[Job]:
+        """
+        Processes every queued chunk, yielding each job as it finishes.
+
+        Args:
+            process (Callable[[Job, Any], Any]): Processes one chunk of a job.
+                Its return value is stored in job.results.
+            on_complete (Callable[[Job], None]): Called on a worker once all
+                chunks of a job are processed, before the job counts as
+                finished. Defaults to None.
+
+        Yields:
+            Job: The next job to finish.
+        """
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                with self._lock:
+                    while self._queue and len(in_flight) < self.workers:
+                        job, index = self._pop()
+                        future = executor.submit(process, job, job.chunks[index])
+                        in_flight[future] = (job, index)
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job, index = in_flight.pop(future)
+                    if index is None:
+                        future.result()
+                        job.finished = time.monotonic()
+                        yield job
+                        continue
+
+                    job.results[index] = future.result()
+                    job._pending -= 1
+                    if job._pending or job._next < len(job.chunks):
+                        continue
+                    if on_complete is None:
+                        job.finished = time.monotonic()
+                        yield job
+                    else:
+                        in_flight[executor.submit(on_complete, job)] = (job, None)
+
+    def report(self) -> ScheduleReport:
+        """Returns the queue wait and completion time percentiles of the jobs."""
+        finished = [job for job in self.jobs if job.finished is not None]
+
+        return ScheduleReport(
+            jobs=len(finished),
+            queue_wait=_percentiles([job.queue_wait for job in finished]),
+            completion_time=_percentiles([job.completion_time for job in finished]),
+        )
+
+    def _key(self, job: Job) -> float:
+        """Returns the virtual deadline of a job."""
+        return time.monotonic() + self.aging * job.cost / 2**job.priority
+
+    def _push(self, job: Job) -> None:
+        """Queues a job that still has chunks to dispatch."""
+        if job._next < len(job.chunks):
+            heapq.heappush(self._queue, (self._key(job), next(self._sequence), job))
+
+    def _pop(self) -> tuple:
+        """Dispatches the next chunk of the job with the earliest deadline."""
+        _, _, job = heapq.heappop(self._queue)
+        index = job._next
+        job._next += 1
+        job._pending += 1
+        if job.started is None:
+            job.started = time.monotonic()
+        self._push(job)
+
+        return job, index
+
+
+def _percentiles(values: list) -> dict:
+    """Returns the median, 90th and 99th percentiles of the values."""
+    if not values:
+        return {}
+    if len(values) == 1:
+        return {"p50": values[0], "p90": values[0], "p99": values[0]}
+
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": cuts[49], "p90": cuts[89], "p99": cuts[98]}
@@ -1,7 +1,23 @@
+import datetime
+import hashlib
+import io
+import json
+import os
+import pathlib
+import re
+from typing import Callable, Iterator
+
 import attrs
 from attrs import field, frozen
 from langchain_community.document_loaders import YoutubeLoader
 
+from src.captions import INFO_SUFFIX, iter_caption_files, iter_captions
+
+TRANSCRIPT_SUFFIX = ".transcript.json"
+
+# The language of a yt-dlp subtitle file, e.g. ".en" or ".pt-BR".
+_LANGUAGE_SUFFIX = re.compile(r"\.[A-Za-z]{2,3}(-[A-Za-z0-9]+)*$")
+
 
 @frozen
 class Metadata:
@@ -22,6 +38,44 @@ class Metadata:
             if len(value) == "":
                 raise ValueError(f"{key} cannot be empty.")
 
+    @classmethod
+    def from_file(cls, path: str) -> "Metadata":
+        """
+        Builds the metadata of a local caption file.
+
+        The metadata is read from a yt-dlp style "<name>.info.json" file next
+        to the caption file when there is one, for caption files named
+        "<name>.<ext>" or, as yt-dlp names subtitles, "<name>.<lang>.<ext>".
+        Otherwise the title is the file name, the publish date its
+        modification date and the URL its file URL.
+
+        Args:
+            path (str): The caption file.
+
+        Returns:
+            Metadata: The metadata of the caption file.
+        """
+        stem = os.path.splitext(path)[0]
+        info = {}
+        for name in [stem, _LANGUAGE_SUFFIX.sub("", stem)]:
+            if os.path.isfile(name + INFO_SUFFIX):
+                with open(name + INFO_SUFFIX, encoding="utf-8") as file:
+                    info = json.load(file)
+                break
+
+        publish_date = datetime.date.fromtimestamp(os.path.getmtime(path)).isoformat()
+        if info.get("upload_date"):
+            publish_date = datetime.datetime.strptime(
+                info["upload_date"], "%Y%m%d"
+            ).strftime("%Y-%m-%d")
+
+        return cls(
+            title=info.get("title") or os.path.basename(stem),
+            publish_date=publish_date,
+            author=info.get("uploader") or info.get("channel") or "Unknown",
+            url=info.get("webpage_url") or pathlib.Path(path).resolve().as_uri(),
+        )
+
     def print(self) -> str:
         """Prints the metadata information."""
         return (
@@ -40,12 +94,15 @@ class Transcript:
     metadata: Metadata = field(factory=Metadata)
 
     @classmethod
-    def get_transcript(cls, url: str) -> "Transcript":
+    def get_transcript(cls, url: str, cache_dir: str = None) -> "Transcript":
         """
         Retrieves a transcript from the given URL.
 
         Args:
             url (str): The URL of the transcript.
+            cache_dir (str): A directory where retrieved transcripts are
+                cached, so later runs need no network access. Defaults to
+                None, which disables caching.
 
         Returns:
             Transcript: The retrieved transcript.
@@ -55,6 +112,15 @@ class Transcript:
         if not url:
             raise ValueError("URL cannot be empty")
 
+        if cache_dir:
+            cache = cls._cache_path(url, cache_dir)
+            if os.path.isfile(cache):
+                return cls.load(cache)
+            transcript = cls.get_transcript(url)
+            os.makedirs(cache_dir, exist_ok=True)
+            transcript.save(cache)
+            return transcript
+
         loader = YoutubeLoader.from_youtube_url(url, add_video_info=True)
         output = loader.load()
         if not output:
@@ -69,6 +135,103 @@ class Transcript:
 
         return cls(content=output.page_content, metadata=metadata)
 
+    def save(self, path: str) -> None:
+        """
+        Saves the transcript and its metadata as JSON.
+
+        Args:
+            path (str): The file to write.
+
+        Returns:
+            None
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(attrs.asdict(self), file)
+
+    @classmethod
+    def load(cls, path: str) -> "Transcript":
+        """
+        Loads a transcript saved by save().
+
+        Args:
+            path (str): The file to read.
+
+        Returns:
+            Transcript: The loaded transcript.
+        """
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+
+        return cls(content=data["content"], metadata=Metadata(**data["metadata"]))
+
+    @staticmethod
+    def _cache_path(url: str, cache_dir: str) -> str:
+        """Returns the cache file of the video at the given URL."""
+        key = hashlib.sha256(url.split("&")[0].encode("utf-8")).hexdigest()[:16]
+
+        return os.path.join(cache_dir, f"{key}{TRANSCRIPT_SUFFIX}")
+
+    @classmethod
+    def from_file(cls, path: str) -> "Transcript":
+        """
+        Builds a transcript from a local .srt, .vtt or youtube-transcript-api
+        .json caption file, or a cached transcript, without any network access.
+
+        Args:
+            path (str): The caption file.
+
+        Returns:
+            Transcript: The transcript of the caption file.
+        """
+        if path.endswith(TRANSCRIPT_SUFFIX):
+            return cls.load(path)
+
+        content = io.StringIO()
+        for text in iter_captions(path):
+            if content.tell():
+                content.write(" ")
+            content.write(text)
+        if not content.tell():
+            raise Exception(f"No transcript available in {path}.")
+
+        return cls(content=content.getvalue(), metadata=Metadata.from_file(path))
+
+    @classmethod
+    def from_files(
+        cls,
+        pattern: str,
+        on_error: Callable[[str, Exception], None] = None,
+    ) -> Iterator["Transcript"]:
+        """
+        Lazily builds the transcripts of local caption files.
+
+        Args:
+            pattern (str): A caption file, a directory of caption files or a
+                glob pattern such as "captions/**/*.vtt".
+            on_error (Callable[[str, Exception], None]): Called with the path
+                and the error of each file that cannot be loaded, which is
+                then skipped. Defaults to None, which raises the error.
+
+        Raises:
+            ValueError: If no caption file matches the pattern.
+
+        Yields:
+            Transcript: The transcript of the next caption file.
+        """
+        found = False
+        for path in iter_caption_files(pattern):
+            found = True
+            try:
+                transcript = cls.from_file(path)
+            except Exception as error:
+                if on_error is None:
+                    raise
+                on_error(path, error)
+                continue
+            yield transcript
+        if not found:
+            raise ValueError(f"No caption files found for {pattern}")
+
     @staticmethod
     def check_url(url: str) -> bool:
         """
@@ -49,3 +49,16 @@ def valid_metadata():
         author="John Doe",
         url="https://example.com/transcript",
     )
+
+
+@pytest.fixture
+def fake_chat():
+    """Answers a request with its user message in upper case, and a merge
+    request with the upper-cased drafts joined by '+'."""
+
+    def chat(**kwargs):
+        content = kwargs["messages"][1].content
+        drafts = content.split("\n\n---\n\n")
+        return iter(["+".join(draft.upper() for draft in drafts)])
+
+    return chat
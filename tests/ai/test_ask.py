@@ -0,0 +1,36 @@
+import pytest
+
+from src.ai import AI
+
+
+class TestAsk:
+    # Only the k retrieved chunks are sent to the model.
+    def test_prompt_bounded_by_k(self, mocker, valid_transcript):
+        chunks = [f"chunk number {i} about topic{i}" for i in range(20)]
+        mocker.patch.object(AI, "_split_transcript", return_value=chunks)
+        chat = mocker.patch.object(AI, "_chat", return_value=["The answer"])
+
+        ai = AI(valid_transcript)
+        result = ai.ask("What about topic7?", k=2)
+
+        assert result == "The answer"
+        system_prompt = chat.call_args.kwargs["messages"][0].content
+        assert "topic7" in system_prompt
+        assert sum(chunk in system_prompt for chunk in chunks) == 2
+
+    # Raises a ValueError when no question is given.
+    def test_empty_question(self, valid_transcript):
+        with pytest.raises(ValueError):
+            AI(valid_transcript).ask("")
+
+    # The index is persisted and reused on later calls.
+    def test_index_persisted(self, mocker, tmp_path, valid_transcript):
+        split = mocker.patch.object(AI, "_split_transcript", return_value=["a chunk"])
+        mocker.patch.object(AI, "_chat", return_value=["The answer"])
+        path = str(tmp_path / "index.npz")
+
+        AI(valid_transcript).ask("question?", index_path=path)
+        AI(valid_transcript).ask("question?", index_path=path)
+
+        assert (tmp_path / "index.npz").exists()
+        split.assert_called_once()
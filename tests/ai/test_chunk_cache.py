@@ -0,0 +1,28 @@
+from src.ai import AI
+from src.cache import ResultCache
+
+
+class TestChunkCache:
+    # Only the chunks that changed since the last run are requested again.
+    def test_unchanged_chunks_reused(
+        self, fake_chat, mocker, tmp_path, valid_transcript
+    ):
+        chat = mocker.patch.object(AI, "_chat", side_effect=fake_chat)
+        cache = ResultCache(str(tmp_path))
+
+        mocker.patch.object(AI, "_iter_transcript", return_value=iter(["a", "b"]))
+        assert AI(valid_transcript, cache=cache).takeaways() == ["A", "B"]
+        mocker.patch.object(AI, "_iter_transcript", return_value=iter(["a", "c"]))
+        assert AI(valid_transcript, cache=cache).takeaways() == ["A", "C"]
+
+        assert chat.call_count == 3
+        assert (cache.stats.hits, cache.stats.misses) == (1, 3)
+
+    # Chunk requests made on their own share the same cache.
+    def test_summarize_chunk(self, fake_chat, mocker, tmp_path, valid_transcript):
+        chat = mocker.patch.object(AI, "_chat", side_effect=fake_chat)
+        ai = AI(valid_transcript, cache=ResultCache(str(tmp_path)))
+
+        assert ai.summarize_chunk("a chunk") == "A CHUNK"
+        assert ai.summarize_chunk("a chunk") == "A CHUNK"
+        assert chat.call_count == 1
@@ -0,0 +1,32 @@
+from src.ai import AI
+
+
+class TestChunkRequests:
+    # A single chunk is summarized with one request.
+    def test_summarize_chunk(self, fake_chat, mocker, valid_transcript):
+        mocker.patch.object(AI, "_chat", side_effect=fake_chat)
+        assert AI(valid_transcript).summarize_chunk("a chunk") == "A CHUNK"
+
+    # The takeaways of a single chunk are listed with one request.
+    def test_extract_takeaways(self, fake_chat, mocker, valid_transcript):
+        mocker.patch.object(AI, "_chat", side_effect=fake_chat)
+        assert AI(valid_transcript).extract_takeaways("a chunk") == "A CHUNK"
+
+    # Drafts are merged into one article, skipping missing drafts.
+    def test_merge_summaries(self, fake_chat, mocker, valid_transcript):
+        mocker.patch("src.ai.count_tokens", return_value=1)
+        mocker.patch.object(AI, "_chat", side_effect=fake_chat)
+
+        article = "".join(AI(valid_transcript).merge_summaries(["a", None, "b"]))
+
+        assert article == "A+B"
+
+    # Chunk requests return None once the run deadline has passed.
+    def test_deadline(self, fake_chat, mocker, valid_transcript):
+        chat = mocker.patch.object(AI, "_chat", side_effect=fake_chat)
+        ai = AI(valid_transcript, deadline=0.001)
+        ai.deadline_at = 0
+
+        assert ai.summarize_chunk("a chunk") is None
+        assert ai.truncated
+        chat.assert_not_called()
@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+
+from src.ai import AI
+from src.hedging import Hedger
+
+
+class TestDeadline:
+    # Chunks completed before the run deadline are returned as partial output.
+    def test_partial_output_after_deadline(self, fake_chat, mocker, valid_transcript):
+        mocker.patch("src.ai.count_tokens", return_value=1)
+        clock = [100.0]
+        mocker.patch("time.monotonic", side_effect=lambda: clock[0])
+
+        def chunks():
+            for chunk in ["one", "two", "three"]:
+                yield chunk
+                clock[0] += 6
+
+        mocker.patch.object(AI, "_iter_transcript", return_value=chunks())
+        chat = mocker.patch.object(AI, "_chat", side_effect=fake_chat)
+
+        ai = AI(valid_transcript, deadline=10)
+        result = ai.summary()
+
+        assert ai.truncated
+        assert result == ["ONE\n\nTWO"]
+        assert chat.call_count == 2
+
+    # A chunk whose request times out is skipped without aborting the others.
+    def test_request_timeout(self, mocker, valid_transcript):
+        mocker.patch.object(
+            AI, "_iter_transcript", return_value=iter(["one", "slow", "three"])
+        )
+        release = threading.Event()
+
+        def chat(**kwargs):
+            content = kwargs["messages"][1].content
+            if content == "slow":
+                release.wait(5)
+            return iter([content.upper()])
+
+        mocker.patch.object(AI, "_chat", side_effect=chat)
+
+        ai = AI(valid_transcript, request_timeout=1)
+        try:
+            result = ai.takeaways()
+        finally:
+            release.set()
+
+        assert result == ["ONE", "THREE"]
+        assert ai.truncated
+        assert ai.hedger.stats.timeouts == 1
+
+    # Drafts whose merge times out are returned unmerged.
+    def test_merge_timeout(self, mocker, valid_transcript):
+        mocker.patch("src.ai.count_tokens", return_value=1)
+        mocker.patch.object(AI, "_iter_transcript", return_value=iter(["one", "two"]))
+        release = threading.Event()
+
+        def chat(**kwargs):
+            content = kwargs["messages"][1].content
+            if "---" in content:
+                release.wait(5)
+            return iter([content.upper()])
+
+        mocker.patch.object(AI, "_chat", side_effect=chat)
+
+        ai = AI(valid_transcript, request_timeout=1)
+        try:
+            result = ai.summary()
+        finally:
+            release.set()
+
+        assert result == ["ONE\n\nTWO"]
+        assert ai.truncated
+
+    # Hedged requests are always bounded, so a losing attempt stuck before
+    # its first token does not live on for the client's default timeout.
+    def test_hedged_requests_bounded(self, fake_chat, mocker, valid_transcript):
+        mocker.patch.object(AI, "_iter_transcript", side_effect=lambda: iter(["one"]))
+        chat = mocker.patch.object(AI, "_chat", side_effect=fake_chat)
+
+        AI(valid_transcript, hedger=Hedger()).takeaways()
+        assert chat.call_args.kwargs["timeout"] == AI.HEDGED_REQUEST_TIMEOUT
+
+        AI(valid_transcript, hedger=Hedger(), request_timeout=5).takeaways()
+        assert chat.call_args.kwargs["timeout"] == 5
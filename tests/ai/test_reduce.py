@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+from src.ai import AI
+
+
+class TestReduce:
+    # Drafts are merged in groups of fan_in until a single group remains.
+    def test_levels_are_logarithmic(self, fake_chat, mocker, valid_transcript):
+        mocker.patch("src.ai.count_tokens", return_value=1)
+        chat = mocker.patch.object(AI, "_chat", side_effect=fake_chat)
+
+        ai = AI(valid_transcript, fan_in=3)
+        remaining = ai._reduce([str(i) for i in range(27)])
+
+        assert remaining == [
+            "0+1+2+3+4+5+6+7+8",
+            "9+10+11+12+13+14+15+16+17",
+            "18+19+20+21+22+23+24+25+26",
+        ]
+        assert chat.call_count == 9 + 3
+
+    # A single draft is returned without any merge request.
+    def test_single_draft(self, mocker, valid_transcript):
+        chat = mocker.patch.object(AI, "_chat")
+        assert AI(valid_transcript)._reduce(["only"]) == ["only"]
+        chat.assert_not_called()
+
+    # Groups are cut when they would exceed the merge context size.
+    def test_groups_respect_context(self, mocker, valid_transcript):
+        mocker.patch("src.ai.count_tokens", return_value=5000)
+        ai = AI(valid_transcript, fan_in=10)
+        groups = ai._group([str(i) for i in range(6)])
+        assert groups == [["0", "1"], ["2", "3"], ["4", "5"]]
+
+    # Merges within a level run in parallel.
+    def test_merges_run_in_parallel(self, fake_chat, mocker, valid_transcript):
+        mocker.patch("src.ai.count_tokens", return_value=1)
+        barrier = threading.Barrier(2, timeout=5)
+
+        def blocking_chat(**kwargs):
+            barrier.wait()
+            return fake_chat(**kwargs)
+
+        mocker.patch.object(AI, "_chat", side_effect=blocking_chat)
+        ai = AI(valid_transcript, fan_in=2, max_workers=2)
+        assert ai._reduce(["a", "b", "c", "d"]) == ["A+B", "C+D"]
+
+    # The summary of a long transcript is a single merged article.
+    def test_summary_is_single_article(self, fake_chat, mocker, valid_transcript):
+        mocker.patch("src.ai.count_tokens", return_value=1)
+        mocker.patch.object(
+            AI, "_iter_transcript", return_value=iter(["a", "b", "c", "d", "e"])
+        )
+        mocker.patch.object(AI, "_chat", side_effect=fake_chat)
+
+        result = AI(valid_transcript, fan_in=2).summary()
+
+        assert result == ["A+B+C+D+E"]
+
+    # Raises a ValueError when fan_in is smaller than two.
+    def test_invalid_fan_in(self, valid_transcript):
+        with pytest.raises(ValueError):
+            AI(valid_transcript, fan_in=1)
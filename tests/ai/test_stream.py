@@ -0,0 +1,34 @@
+from src.ai import AI
+
+
+class TestStream:
+    # The takeaways are streamed token by token, one chunk at a time.
+    def test_stream_takeaways(self, mocker, valid_transcript):
+        mocker.patch.object(AI, "_iter_transcript", return_value=iter(["one", "two"]))
+        chat = mocker.patch.object(
+            AI, "_chat", side_effect=lambda **kwargs: iter(["a", "b"])
+        )
+
+        stream = AI(valid_transcript).stream_takeaways()
+        assert next(stream) == "a"
+        assert chat.call_count == 1
+        assert list(stream) == ["b", "a", "b"]
+        assert chat.call_count == 2
+
+    # The final merge of the summary is streamed token by token.
+    def test_stream_summary(self, mocker, valid_transcript):
+        mocker.patch("src.ai.count_tokens", return_value=1)
+        mocker.patch.object(AI, "_iter_transcript", return_value=iter(["one", "two"]))
+        mocker.patch.object(AI, "_chat", side_effect=lambda **kwargs: iter(["a", "b"]))
+
+        assert list(AI(valid_transcript).stream_summary()) == ["a", "b"]
+
+    # Each takeaways request only carries its own chunk of the transcript.
+    def test_takeaways_sends_chunk(self, mocker, valid_transcript):
+        mocker.patch.object(AI, "_iter_transcript", return_value=iter(["one", "two"]))
+        chat = mocker.patch.object(AI, "_chat", return_value=iter(["x"]))
+
+        list(AI(valid_transcript).stream_takeaways())
+
+        sent = [call.kwargs["messages"][1].content for call in chat.call_args_list]
+        assert sent == ["one", "two"]
@@ -6,7 +6,9 @@ class TestSummary:
     def test_valid_transcript_and_metadata(self, mocker, valid_transcript):
         # Mock the necessary dependencies
         transcript = valid_transcript
-        mocker.patch.object(AI, "_split_transcript", return_value=["This is a chunk"])
+        mocker.patch.object(
+            AI, "_iter_transcript", return_value=iter(["This is a chunk"])
+        )
         mocker.patch.object(AI, "_chat", return_value=["Generated summary"])
 
         # Initialize the AI object
@@ -22,7 +24,9 @@ class TestSummary:
     def test_return_type(self, mocker, valid_transcript):
         # Mock the necessary dependencies
         transcript = valid_transcript
-        mocker.patch.object(AI, "_split_transcript", return_value=["This is a chunk"])
+        mocker.patch.object(
+            AI, "_iter_transcript", return_value=iter(["This is a chunk"])
+        )
         mocker.patch.object(AI, "_chat", return_value=["Generated summary"])
 
         # Initialize the AI object
@@ -38,7 +42,9 @@ class TestSummary:
     def test_text_splitter(self, mocker, valid_transcript):
         # Mock the necessary dependencies
         transcript = valid_transcript
-        mocker.patch.object(AI, "_split_transcript", return_value=["This is a chunk"])
+        mocker.patch.object(
+            AI, "_iter_transcript", return_value=iter(["This is a chunk"])
+        )
         mocker.patch.object(AI, "_chat", return_value=["Generated summary"])
 
         # Initialize the AI object
@@ -48,4 +54,4 @@ class TestSummary:
         ai.summary()
 
         # Assert that the text splitter is called
-        AI._split_transcript.assert_called_once()
+        AI._iter_transcript.assert_called_once()
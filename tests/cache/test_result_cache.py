@@ -0,0 +1,57 @@
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from src.cache import ResultCache
+
+
+def make_messages(chunk):
+    return [SystemMessage(content="Summarize."), HumanMessage(content=chunk)]
+
+
+class TestResultCache:
+    # Requests with the same messages share a key, others do not.
+    def test_key(self):
+        assert ResultCache.key(make_messages("a")) == ResultCache.key(
+            make_messages("a")
+        )
+        assert ResultCache.key(make_messages("a")) != ResultCache.key(
+            make_messages("b")
+        )
+
+    # A cached response is returned by later caches of the same directory.
+    def test_put_get(self, tmp_path):
+        key = ResultCache.key(make_messages("a"))
+        assert ResultCache(str(tmp_path)).get(key) is None
+        ResultCache(str(tmp_path)).put(key, "response")
+        cache = ResultCache(str(tmp_path))
+        assert cache.get(key) == "response"
+        assert (cache.stats.hits, cache.stats.misses) == (1, 0)
+
+    # Checking whether a response is cached does not count as a lookup.
+    def test_contains(self, tmp_path):
+        cache = ResultCache(str(tmp_path))
+        assert "key" not in cache
+        cache.put("key", "response")
+        assert "key" in cache
+        assert (cache.stats.hits, cache.stats.misses) == (0, 0)
+
+    # A streamed response is passed through and cached once complete.
+    def test_record(self, tmp_path):
+        cache = ResultCache(str(tmp_path))
+        assert list(cache.record("key", iter(["a", "b"]))) == ["a", "b"]
+        assert cache.get("key") == "ab"
+
+    # An interrupted stream is not cached.
+    def test_record_interrupted(self, tmp_path):
+        def pieces():
+            yield "a"
+            raise TimeoutError()
+
+        cache = ResultCache(str(tmp_path))
+        stream = cache.record("key", pieces())
+        assert next(stream) == "a"
+        try:
+            next(stream)
+        except TimeoutError:
+            pass
+        assert cache.get("key") is None
+        assert not list(tmp_path.glob("*.tmp"))
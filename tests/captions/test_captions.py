@@ -0,0 +1,86 @@
+import io
+import json
+
+import pytest
+
+from src.captions import iter_caption_files, iter_json, iter_srt, iter_vtt
+
+SRT = """1
+00:00:01,000 --> 00:00:02,000
+Hello <i>world</i>
+
+2
+00:00:02,500 --> 00:00:04,000
+Second line
+continues here
+"""
+
+VTT = """WEBVTT
+Kind: captions
+
+NOTE a comment
+that spans lines
+
+00:00:01.000 --> 00:00:02.000 align:start
+Hello <c>world</c>
+
+cue-2
+00:00:02.000 --> 00:00:03.000
+Hello world
+and more
+"""
+
+
+class TestParsers:
+    # SRT cue text is parsed without indices, timings or markup.
+    def test_srt(self):
+        assert list(iter_srt(io.StringIO(SRT))) == [
+            "Hello world",
+            "Second line",
+            "continues here",
+        ]
+
+    # WebVTT cue text is parsed without headers, notes or repeated lines.
+    def test_vtt(self):
+        assert list(iter_vtt(io.StringIO(VTT))) == ["Hello world", "and more"]
+
+    # youtube-transcript-api JSON is parsed across buffer boundaries.
+    def test_json_streaming(self):
+        captions = [
+            {"text": f"line {i}\nwrapped", "start": i, "duration": 1} for i in range(50)
+        ]
+        file = io.StringIO(json.dumps(captions))
+        texts = list(iter_json(file, buffer_size=16))
+        assert texts == [f"line {i} wrapped" for i in range(50)]
+
+    # An empty JSON list yields no captions.
+    def test_json_empty(self):
+        assert list(iter_json(io.StringIO("[]"))) == []
+
+    # Raises a ValueError for JSON that is not a list or is truncated.
+    def test_json_invalid(self):
+        with pytest.raises(ValueError):
+            list(iter_json(io.StringIO('{"text": "x"}')))
+        with pytest.raises(ValueError):
+            list(iter_json(io.StringIO('[{"text": "x"}, {"te')))
+
+
+class TestIterCaptionFiles:
+    # A directory yields its caption files, sorted, without metadata files.
+    def test_directory(self, tmp_path):
+        for name in ["b.vtt", "a.srt", "c.json", "c.info.json", "notes.txt"]:
+            (tmp_path / name).write_text("")
+        paths = list(iter_caption_files(str(tmp_path)))
+        assert [path.rsplit("/", 1)[1] for path in paths] == [
+            "a.srt",
+            "b.vtt",
+            "c.json",
+        ]
+
+    # A glob pattern yields the matching caption files, recursively.
+    def test_glob(self, tmp_path):
+        (tmp_path / "nested").mkdir()
+        (tmp_path / "nested" / "a.vtt").write_text("")
+        (tmp_path / "b.srt").write_text("")
+        paths = list(iter_caption_files(str(tmp_path / "**" / "*.vtt")))
+        assert [path.rsplit("/", 1)[1] for path in paths] == ["a.vtt"]
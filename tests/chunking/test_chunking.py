@@ -0,0 +1,109 @@
+import random
+import types
+
+import pytest
+
+from src.chunking import expected_chunk_size, iter_content_chunks
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def make_text(words, seed=0):
+    generator = random.Random(seed)
+    return " ".join(f"word{generator.randrange(1000)}" for _ in range(words))
+
+
+def fixed_chunks(text, chunk_size, length_function):
+    words = text.split()
+    for start in range(0, len(words), chunk_size):
+        yield " ".join(words[start : start + chunk_size])
+
+
+class TestIterContentChunks:
+    # Chunks are produced lazily rather than as a list.
+    def test_returns_generator(self):
+        chunks = iter_content_chunks("one two", 2, length_function=word_count)
+        assert isinstance(chunks, types.GeneratorType)
+
+    # No chunk exceeds the chunk size, chunks average about the average size
+    # and no words are lost.
+    def test_chunks_bounded_by_size(self):
+        text = make_text(20000)
+        chunks = list(
+            iter_content_chunks(text, chunk_size=100, length_function=word_count)
+        )
+        sizes = [word_count(chunk) for chunk in chunks]
+        assert max(sizes) <= 100
+        assert 60 <= sum(sizes) / len(sizes) <= 85
+        assert " ".join(chunks) == text
+
+    # An edit only changes the chunks around it, unlike fixed-size chunks.
+    def test_boundaries_stable_under_edits(self):
+        words = make_text(20000).split()
+        edited = words[:5000] + ["inserted", "words"] + words[5000:]
+        del edited[15000:15003]
+
+        def changed(split):
+            before = list(split(" ".join(words), 100, length_function=word_count))
+            after = list(split(" ".join(edited), 100, length_function=word_count))
+            return len(set(after) - set(before))
+
+        assert changed(iter_content_chunks) <= 6
+        assert changed(fixed_chunks) > 50
+
+    # Chunking is deterministic.
+    def test_deterministic(self):
+        text = make_text(2000)
+        first = list(iter_content_chunks(text, 100, length_function=word_count))
+        second = list(iter_content_chunks(text, 100, length_function=word_count))
+        assert first == second
+
+    # A text shorter than the minimum size yields a single chunk.
+    def test_short_text(self):
+        chunks = list(iter_content_chunks("a short text", length_function=word_count))
+        assert chunks == ["a short text"]
+
+    # An empty text yields no chunks.
+    def test_empty_text(self):
+        assert list(iter_content_chunks("   ", length_function=word_count)) == []
+
+    # Raises a TypeError when the text is not a string.
+    def test_non_string_text(self):
+        with pytest.raises(TypeError):
+            list(iter_content_chunks(12345, length_function=word_count))
+
+    # Raises a ValueError when the sizes are inconsistent.
+    def test_invalid_sizes(self):
+        with pytest.raises(ValueError):
+            list(iter_content_chunks("text", chunk_size=0))
+        with pytest.raises(ValueError):
+            list(iter_content_chunks("text", chunk_size=10, average_size=20))
+        with pytest.raises(ValueError):
+            list(iter_content_chunks("text", chunk_size=10, min_size=8))
+
+
+class TestExpectedChunkSize:
+    # The expected size matches the measured average, excluding the last,
+    # partial chunk, to within a few percent.
+    @pytest.mark.parametrize("chunk_size", [100, 1000])
+    def test_matches_measured_average(self, chunk_size):
+        text = make_text(300 * chunk_size)
+        sizes = [
+            word_count(chunk)
+            for chunk in iter_content_chunks(
+                text, chunk_size=chunk_size, length_function=word_count
+            )
+        ][:-1]
+        expected = expected_chunk_size(chunk_size)
+        assert sum(sizes) / len(sizes) == pytest.approx(expected, rel=0.03)
+
+    # With the default sizes, chunks average about 72% of the chunk size.
+    def test_default_sizes(self):
+        assert expected_chunk_size(10000) == pytest.approx(7162, abs=1)
+
+    # Raises a ValueError when the sizes are inconsistent.
+    def test_invalid_sizes(self):
+        with pytest.raises(ValueError):
+            expected_chunk_size(10, average_size=20)
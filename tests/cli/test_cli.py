@@ -0,0 +1,233 @@
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from src.ai import AI
+from src.cli import _reuse, main
+from src.dedup import DedupIndex
+
+
+class FakeEncoding:
+    def encode_ordinary(self, text):
+        return text.split()
+
+
+@pytest.fixture(autouse=True)
+def offline(mocker, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "key")
+    mocker.patch("src.chunking._encoding", return_value=FakeEncoding())
+    mocker.patch("src.ai.count_tokens", side_effect=lambda text: len(text.split()))
+    mocker.patch("src.cli.count_tokens", side_effect=lambda text: len(text.split()))
+    mocker.patch(
+        "src.planning.count_tokens", side_effect=lambda text: len(text.split())
+    )
+    return mocker.patch.object(
+        AI, "_chat", side_effect=lambda **kwargs: iter(["output"])
+    )
+
+
+@pytest.fixture
+def captions(tmp_path):
+    path = tmp_path / "talk.srt"
+    path.write_text("1\n00:00:01,000 --> 00:00:02,000\nHello world\n")
+    return str(path)
+
+
+class TestDedup:
+    # A scheduled run reuses the results of an indexed duplicate without
+    # requesting anything.
+    def test_scheduled_duplicate(self, offline, captions, tmp_path):
+        index = str(tmp_path / "index.json")
+        args = ["--url", captions, "--dedup-index", index]
+
+        first = CliRunner().invoke(main, args)
+        assert first.exit_code == 0, first.output
+        requests = offline.call_count
+
+        second = CliRunner().invoke(main, args + ["--schedule"])
+        assert second.exit_code == 0, second.output
+        assert "output" in second.output
+        assert offline.call_count == requests
+
+    # Duplicates within a scheduled batch are only summarized once, as in a
+    # sequential run.
+    def test_scheduled_duplicates_in_batch(self, offline, tmp_path):
+        for name in ["a", "b"]:
+            (tmp_path / f"{name}.srt").write_text(
+                "1\n00:00:01,000 --> 00:00:02,000\nThe same talk\n"
+            )
+        index = str(tmp_path / "index.json")
+        args = ["--url", str(tmp_path / "*.srt"), "--dedup-index", index]
+
+        result = CliRunner().invoke(main, args + ["--schedule"])
+
+        assert result.exit_code == 0, result.output
+        assert offline.call_count == 2
+        assert result.output.count("output") == 4
+        assert len(DedupIndex.open(index).entries) == 2
+
+    # The index is saved once per run rather than after every video.
+    def test_saved_once(self, mocker, tmp_path):
+        for name in ["a", "b", "c"]:
+            (tmp_path / f"{name}.srt").write_text(
+                f"1\n00:00:01,000 --> 00:00:02,000\nTalk {name}\n"
+            )
+        save = mocker.spy(DedupIndex, "save")
+        index = str(tmp_path / "index.json")
+
+        result = CliRunner().invoke(
+            main, ["--url", str(tmp_path / "*.srt"), "--dedup-index", index]
+        )
+
+        assert result.exit_code == 0, result.output
+        assert save.call_count == 1
+        assert len(DedupIndex.open(index).entries) == 3
+
+
+class TestDeadline:
+    # The deadline bounds the whole run rather than each video, and the
+    # hedging statistics are reported once for the run.
+    def test_run_deadline(self, mocker, offline, tmp_path):
+        for name in ["a", "b", "c"]:
+            (tmp_path / f"{name}.srt").write_text(
+                f"1\n00:00:01,000 --> 00:00:02,000\nTalk {name}\n"
+            )
+        clock = [100.0]
+        mocker.patch("time.monotonic", side_effect=lambda: clock[0])
+
+        def chat(**kwargs):
+            clock[0] += 0.3
+            return iter(["output"])
+
+        offline.side_effect = chat
+        args = ["--url", str(tmp_path), "--no-article", "--no-hedge"]
+
+        result = CliRunner().invoke(main, args + ["--deadline", "0.5"])
+
+        assert result.exit_code == 0, result.output
+        assert offline.call_count == 2
+        assert result.output.count("the output is incomplete") == 1
+        assert result.output.count("Requests: ") == 1
+
+
+class TestBatch:
+    # Bad caption files and outputs that already exist are reported and
+    # skipped without aborting the batch.
+    def test_skips_bad_files(self, monkeypatch, tmp_path):
+        captions = tmp_path / "captions"
+        (captions / "en").mkdir(parents=True)
+        for path in [captions / "talk.srt", captions / "en" / "talk.srt"]:
+            path.write_text("1\n00:00:01,000 --> 00:00:02,000\nHello\n")
+        (captions / "empty.vtt").write_text("WEBVTT\n")
+        pattern = str(captions / "**" / "*.*")
+
+        (tmp_path / "out").mkdir()
+        monkeypatch.chdir(tmp_path / "out")
+        result = CliRunner().invoke(main, ["--url", pattern, "--write"])
+
+        assert result.exit_code == 0, result.output
+        assert result.output.count("Skipping") == 2
+        assert "empty.vtt" in result.output
+        assert "talk.md already exists" in result.output
+        assert os.listdir(tmp_path / "out") == ["talk.md"]
+
+    # Videos whose output already exists are skipped before any request is
+    # made for them, in scheduled mode too.
+    @pytest.mark.parametrize("mode", [[], ["--schedule"]])
+    def test_existing_outputs_not_processed(self, offline, monkeypatch, tmp_path, mode):
+        captions = tmp_path / "captions"
+        captions.mkdir()
+        for name in ["a", "b"]:
+            (captions / f"{name}.srt").write_text(
+                f"1\n00:00:01,000 --> 00:00:02,000\nTalk {name}\n"
+            )
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "a.md").write_text("done")
+        (tmp_path / "b.md").write_text("done")
+
+        result = CliRunner().invoke(main, ["--url", str(captions), "--write"] + mode)
+
+        assert result.exit_code == 0, result.output
+        assert offline.call_count == 0
+        assert result.output.count("already exists") == 2
+
+    # With caption files, --index is a directory holding one index per
+    # video, rather than one file every video overwrites.
+    def test_index_per_video(self, offline, tmp_path):
+        captions = tmp_path / "captions"
+        captions.mkdir()
+        for name in ["a", "b"]:
+            (captions / f"{name}.srt").write_text(
+                f"1\n00:00:01,000 --> 00:00:02,000\nTalk {name}\n"
+            )
+        index = tmp_path / "index"
+        args = ["--url", str(captions), "--ask", "What?", "--index", str(index)]
+
+        result = CliRunner().invoke(main, args)
+
+        assert result.exit_code == 0, result.output
+        assert len(os.listdir(index)) == 2
+        assert all(name.endswith(".npz") for name in os.listdir(index))
+
+
+class TestPriority:
+    # A prioritized video is started before a shorter one that would
+    # otherwise go first.
+    @pytest.mark.parametrize("priority", [[], ["--priority", "*long*=10"]])
+    def test_prioritized_video_first(self, offline, tmp_path, priority):
+        captions = tmp_path / "captions"
+        captions.mkdir()
+        (captions / "short.srt").write_text(
+            "1\n00:00:01,000 --> 00:00:02,000\nShort talk\n"
+        )
+        (captions / "long.srt").write_text(
+            "1\n00:00:01,000 --> 00:00:02,000\n" + " ".join(["Long"] * 200) + "\n"
+        )
+        args = ["--url", str(captions), "--takeaways", "--schedule", "--workers", "1"]
+
+        result = CliRunner().invoke(main, args + priority)
+
+        assert result.exit_code == 0, result.output
+        first = offline.call_args_list[0].kwargs["messages"][-1].content
+        assert first.startswith("Long" if priority else "Short")
+
+    # A priority that is not of the form PATTERN=LEVEL is rejected.
+    @pytest.mark.parametrize("value", ["*long*", "*long*=high", "=1"])
+    def test_invalid_priority(self, captions, value):
+        result = CliRunner().invoke(main, ["--url", captions, "--priority", value])
+        assert result.exit_code == 2
+        assert "PATTERN=LEVEL" in result.output
+
+
+class TestDryRun:
+    # A dry run leaves out the chunk requests whose responses are in the
+    # chunk cache, so a refresh is not estimated as a full recompute.
+    def test_chunk_cache_hits(self, offline, captions, tmp_path):
+        args = ["--url", captions, "--article", "--takeaways"]
+        cache = ["--chunk-cache", str(tmp_path / "cache")]
+
+        cold = CliRunner().invoke(main, args + cache + ["--dry-run"])
+        assert cold.exit_code == 0, cold.output
+        assert "Requests: 2\n" in cold.output
+        assert "Cached Chunk Requests" not in cold.output
+
+        assert CliRunner().invoke(main, args + cache).exit_code == 0
+        warm = CliRunner().invoke(main, args + cache + ["--dry-run"])
+        assert warm.exit_code == 0, warm.output
+        assert "Requests: 0\n" in warm.output
+        assert "Cached Chunk Requests: 2\n" in warm.output
+
+
+class TestReuse:
+    # A streamed result is passed through without being collected when it
+    # is not indexed.
+    def test_not_collected_without_results(self):
+        stream = _reuse("takeaways", lambda: iter(["a", "b"]), None, None, None)
+        assert list(stream) == ["a", "b"]
+
+    # A streamed result is collected when it is indexed.
+    def test_collected_with_results(self):
+        results = {}
+        assert list(_reuse("takeaways", lambda: iter(["a", "b"]), None, None, results))
+        assert results == {"takeaways": "ab"}
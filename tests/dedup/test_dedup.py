@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from src.dedup import DedupIndex, MinHasher, similarity
+
+random.seed(0)
+VOCABULARY = [f"word{i}" for i in range(2000)]
+
+
+def talk(length=2000):
+    return " ".join(random.choice(VOCABULARY) for _ in range(length))
+
+
+class TestMinHasher:
+    # Identical texts have identical signatures.
+    def test_identical_texts(self):
+        hasher = MinHasher()
+        text = talk()
+        assert similarity(hasher.signature(text), hasher.signature(text)) == 1.0
+
+    # A re-cut with a new intro is estimated as highly similar.
+    def test_recut_is_similar(self):
+        hasher = MinHasher()
+        text = talk()
+        recut = talk(100) + " " + text
+        assert similarity(hasher.signature(text), hasher.signature(recut)) > 0.8
+
+    # Unrelated texts are estimated as dissimilar.
+    def test_unrelated_texts(self):
+        hasher = MinHasher()
+        assert similarity(hasher.signature(talk()), hasher.signature(talk())) < 0.1
+
+    # Signatures do not depend on the block size used to compute them.
+    def test_block_size(self):
+        hasher = MinHasher()
+        text = talk()
+        assert (hasher.signature(text) == hasher.signature(text, block_size=7)).all()
+
+
+class TestDedupIndex:
+    # A near-duplicate transcript returns the stored results.
+    def test_query_finds_duplicate(self):
+        index = DedupIndex()
+        text = talk()
+        index.add("url1", text, "Title", {"article": "An article"})
+
+        match = index.query(talk(50) + " " + text)
+
+        assert match["key"] == "url1"
+        assert match["results"] == {"article": "An article"}
+        assert match["similarity"] >= index.threshold
+
+    # An unrelated transcript has no match.
+    def test_query_without_duplicate(self):
+        index = DedupIndex()
+        index.add("url1", talk(), "Title", {})
+        assert index.query(talk()) is None
+
+    # Only transcripts sharing an LSH band are compared.
+    def test_lookup_is_bucketed(self, mocker):
+        index = DedupIndex()
+        for i in range(20):
+            index.add(f"url{i}", talk(300), "Title", {})
+        compare = mocker.patch("src.dedup.similarity", return_value=0.0)
+        index.query(talk(300))
+        assert compare.call_count < 20
+
+    # The index survives a save/open round trip.
+    def test_save_and_open(self, tmp_path):
+        path = str(tmp_path / "dedup.json")
+        text = talk()
+        index = DedupIndex.open(path)
+        index.add("url1", text, "Title", {"takeaways": "Some takeaways"})
+        index.save()
+
+        match = DedupIndex.open(path).query(text)
+
+        assert match["results"] == {"takeaways": "Some takeaways"}
+
+    # Re-adding a key replaces its entry.
+    def test_add_replaces(self):
+        index = DedupIndex()
+        text = talk()
+        index.add("url1", text, "Title", {"article": "old"})
+        index.add("url1", text, "Title", {"article": "new"})
+        assert index.query(text)["results"] == {"article": "new"}
+
+    # Raises a ValueError for a threshold outside (0, 1].
+    def test_invalid_threshold(self):
+        with pytest.raises(ValueError):
+            DedupIndex(threshold=0)
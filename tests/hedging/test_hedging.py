@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+
+from src.hedging import Hedger
+
+
+def slow_stream(delay, tokens=("a", "b")):
+    """Returns a stream factory whose first token arrives after delay."""
+
+    def stream():
+        time.sleep(delay)
+        yield from tokens
+
+    return stream
+
+
+class TestHedger:
+    # A request without hedging returns the joined token stream.
+    def test_run_returns_text(self):
+        hedger = Hedger(hedge=False)
+        assert hedger.run(slow_stream(0)) == "ab"
+        assert hedger.stats.requests == 1
+        assert hedger.stats.hedged == 0
+
+    # No hedge is issued before enough first tokens have been observed.
+    def test_no_hedge_without_samples(self):
+        hedger = Hedger(min_samples=3)
+        assert hedger.hedge_delay() is None
+        hedger.run(slow_stream(0))
+        assert hedger.hedge_delay() is None
+
+    # The hedge delay is the configured percentile of observed first tokens.
+    def test_hedge_delay_percentile(self):
+        hedger = Hedger(percentile=50, min_samples=1)
+        hedger._samples.extend([0.1, 0.2, 0.3, 0.4, 0.5])
+        assert hedger.hedge_delay() == 0.3
+
+    # A slow request is hedged and the faster duplicate wins.
+    def test_slow_request_is_hedged(self):
+        hedger = Hedger(min_samples=1)
+        hedger._samples.append(0.01)
+        calls = []
+
+        def stream():
+            calls.append(None)
+            delay = 5 if len(calls) == 1 else 0
+            return slow_stream(delay, ("fast",))()
+
+        assert hedger.run(stream, timeout=2) == "fast"
+        assert len(calls) == 2
+        assert hedger.stats.hedged == 1
+        assert hedger.stats.hedge_wins == 1
+
+    # The losing attempt stops consuming its stream once cancelled.
+    def test_loser_is_cancelled(self):
+        hedger = Hedger(min_samples=1)
+        hedger._samples.append(0.01)
+        release = threading.Event()
+        consumed = []
+        calls = []
+
+        def stream():
+            calls.append(None)
+            if len(calls) == 2:
+                yield "fast"
+                return
+            release.wait(2)
+            for token in ["slow1", "slow2", "slow3"]:
+                consumed.append(token)
+                yield token
+
+        assert hedger.run(stream, timeout=2) == "fast"
+        release.set()
+        time.sleep(0.1)
+        assert consumed == ["slow1"]
+
+    # A request that does not complete in time raises a TimeoutError.
+    def test_timeout(self):
+        hedger = Hedger(hedge=False)
+        with pytest.raises(TimeoutError):
+            hedger.run(slow_stream(5), timeout=0.05)
+        assert hedger.stats.timeouts == 1
+
+    # Errors from the request are raised to the caller.
+    def test_error_is_raised(self):
+        def stream():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError, match="boom"):
+            Hedger(hedge=False).run(stream, timeout=1)
+
+    # Raises a ValueError for a percentile outside (0, 100].
+    def test_invalid_percentile(self):
+        with pytest.raises(ValueError):
+            Hedger(percentile=0)
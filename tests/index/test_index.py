@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from src.index import HashedNgramEmbedder, VectorIndex
+
+
+class TestHashedNgramEmbedder:
+    # Embeddings are L2-normalized and have the configured dimension.
+    def test_embed_shape_and_norm(self):
+        vectors = HashedNgramEmbedder(dim=64).embed(["hello world", "another text"])
+        assert vectors.shape == (2, 64)
+        assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+
+    # Embedding the same text twice yields the same vector.
+    def test_embed_is_deterministic(self):
+        embedder = HashedNgramEmbedder()
+        assert np.array_equal(embedder.embed(["same"]), embedder.embed(["same"]))
+
+    # Text without any words embeds to the zero vector.
+    def test_embed_empty_text(self):
+        vectors = HashedNgramEmbedder(dim=16).embed([""])
+        assert not vectors.any()
+
+
+class TestVectorIndex:
+    chunks = [
+        "The chef explains how to bake sourdough bread with a starter.",
+        "Next we talk about the history of the roman empire and its emperors.",
+        "Finally the speaker covers rust ownership and the borrow checker.",
+    ]
+
+    # Search returns the most relevant chunk for a query.
+    def test_search_returns_relevant_chunk(self):
+        index = VectorIndex.build(self.chunks)
+        assert index.search("roman emperors", k=1) == [self.chunks[1]]
+
+    # Search never returns more chunks than requested or than indexed.
+    def test_search_bounded_by_k(self):
+        index = VectorIndex.build(self.chunks)
+        assert len(index.search("bread", k=2)) == 2
+        assert len(index.search("bread", k=10)) == 3
+
+    # Search raises a ValueError when k is not positive.
+    def test_search_invalid_k(self):
+        with pytest.raises(ValueError):
+            VectorIndex.build(self.chunks).search("bread", k=0)
+
+    # An index survives a save/load round trip.
+    def test_save_and_load(self, tmp_path):
+        path = tmp_path / "index.npz"
+        VectorIndex.build(self.chunks, fingerprint="abc").save(str(path))
+        index = VectorIndex.load(str(path))
+        assert index.chunks == self.chunks
+        assert index.fingerprint == "abc"
+        assert index.search("borrow checker", k=1) == [self.chunks[2]]
+
+    # An index on disk is reused for the same transcript and rebuilt otherwise.
+    def test_open_reuses_matching_index(self, tmp_path, mocker):
+        path = str(tmp_path / "index.npz")
+        factory = mocker.Mock(return_value=self.chunks)
+        VectorIndex.open(path, factory, "transcript")
+        VectorIndex.open(path, factory, "transcript")
+        assert factory.call_count == 1
+
+        VectorIndex.open(path, factory, "corrected transcript")
+        assert factory.call_count == 2
+
+    # An index built with other chunking or embedder settings is rebuilt.
+    def test_open_rebuilds_for_other_settings(self, tmp_path, mocker):
+        path = str(tmp_path / "index.npz")
+        factory = mocker.Mock(return_value=self.chunks)
+        VectorIndex.open(path, factory, "transcript", chunking="v1:1000")
+        VectorIndex.open(path, factory, "transcript", chunking="v1:1000")
+        assert factory.call_count == 1
+
+        VectorIndex.open(path, factory, "transcript", chunking="v2:1000")
+        assert factory.call_count == 2
+        VectorIndex.open(
+            path,
+            factory,
+            "transcript",
+            chunking="v2:1000",
+            embedder=HashedNgramEmbedder(dim=64),
+        )
+        assert factory.call_count == 3
+        assert VectorIndex.load(path).embedder.dim == 64
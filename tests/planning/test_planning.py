@@ -0,0 +1,140 @@
+import random
+from unittest.mock import patch
+
+import pytest
+
+from src.ai import summary_messages
+from src.cache import ResultCache
+from src.chunking import iter_content_chunks
+from src.planning import Planner, StageEstimate
+from src.transcript import Metadata, Transcript
+
+
+def word_count(text):
+    return len(text.split())
+
+
+@pytest.fixture(autouse=True)
+def count_words():
+    with patch("src.planning.count_tokens", side_effect=word_count), patch(
+        "src.chunking._count_word_tokens", side_effect=word_count
+    ):
+        yield
+
+
+def make_transcript(words, title="Title", content=None):
+    return Transcript(
+        content=content or " ".join(["word"] * words),
+        metadata=Metadata(
+            title=title,
+            publish_date="2024-01-01",
+            author="Author",
+            url="https://www.youtube.com/watch?v=abc",
+        ),
+    )
+
+
+class TestPlanner:
+    # A transcript is split into chunks of the expected content-defined chunk
+    # size, 72 tokens for a chunk size of 100, one draft request each.
+    def test_chunks_and_drafts(self):
+        planner = Planner(chunk_size=100)
+        video = planner.plan_video(make_transcript(250), ["article"])
+        assert video.tokens == 250
+        assert video.chunks == 4
+        assert video.stages["article (draft)"].requests == 4
+        assert video.stages["article (draft)"].input_tokens == 250 + 4 * 61
+
+    # The merge stage mirrors the tree reduce: a single draft needs no merge,
+    # and many drafts are merged level by level.
+    def test_merge_requests(self):
+        planner = Planner(chunk_size=100, fan_in=2, merge_context_size=1000)
+        single = planner.plan_video(make_transcript(72), ["article"])
+        assert single.stages["article (merge)"].requests == 0
+        many = planner.plan_video(make_transcript(600), ["article"])
+        assert many.stages["article (merge)"].requests == 8
+
+    # Only the requested outputs are planned.
+    def test_kinds(self):
+        video = Planner().plan_video(make_transcript(10), ["takeaways", "ask"])
+        assert list(video.stages) == ["takeaways", "ask"]
+
+    # Totals sum over videos and stages, and cost follows the token counts.
+    def test_totals(self):
+        plan = Planner(chunk_size=100).plan(
+            [make_transcript(72), make_transcript(144)], ["takeaways"]
+        )
+        assert plan.total.requests == 3
+        assert plan.stages["takeaways"].requests == 3
+        assert plan.total.cost == pytest.approx(
+            plan.total.input_tokens / 1000 * 0.003
+            + plan.total.output_tokens / 1000 * 0.004
+        )
+
+    # Scheduling videos concurrently shortens the estimated wall time, which
+    # is still bounded by the rate limits.
+    def test_wall_time(self):
+        transcripts = [make_transcript(1000) for _ in range(4)]
+        planner = Planner(chunk_size=100, workers=4)
+        sequential = planner.plan(transcripts, ["article"])
+        scheduled = planner.plan(transcripts, ["article"], schedule=True)
+        assert scheduled.wall_time < sequential.wall_time
+        limited = planner.plan(transcripts, ["article"], requests_per_minute=1)
+        assert limited.wall_time == limited.total.requests * 60
+
+    # A scheduled video's chunks run in parallel on all workers, so more
+    # workers shorten its estimated wall time.
+    def test_scheduled_chunks_use_workers(self):
+        transcripts = [make_transcript(60000)]
+        kinds = ["article", "takeaways"]
+        plans = {
+            workers: Planner(workers=workers).plan(
+                transcripts, kinds, tokens_per_minute=10**9, schedule=True
+            )
+            for workers in [4, 8]
+        }
+        sequential = Planner(workers=8).plan(
+            transcripts, kinds, tokens_per_minute=10**9
+        )
+        assert plans[8].wall_time < plans[4].wall_time < sequential.wall_time
+
+    # With a cache, the transcript is split into its actual chunks and the
+    # chunk requests whose responses are cached are left out, while their
+    # drafts are still merged.
+    def test_cached_chunks(self, tmp_path):
+        generator = random.Random(0)
+        content = " ".join(f"word{generator.randrange(1000)}" for _ in range(500))
+        transcript = make_transcript(0, content=content)
+        chunks = list(
+            iter_content_chunks(content, chunk_size=100, length_function=word_count)
+        )
+        cache = ResultCache(str(tmp_path))
+        planner = Planner(chunk_size=100, fan_in=2, cache=cache)
+        kinds = ["article", "takeaways"]
+        cold = planner.plan_video(transcript, kinds)
+        assert cold.chunks == len(chunks)
+        assert cold.cached == 0
+
+        cache.put(cache.key(summary_messages("Title", chunks[0])), "draft")
+        warm = planner.plan_video(transcript, kinds)
+        assert warm.cached == 1
+        assert warm.stages["article (draft)"].requests == len(chunks) - 1
+        assert warm.stages["takeaways"].requests == len(chunks)
+        assert warm.stages["article (merge)"] == cold.stages["article (merge)"]
+        output = planner.plan([transcript], kinds).print()
+        assert "Cached Chunk Requests: 1\n" in output
+
+    # The printed plan shows the totals.
+    def test_print(self):
+        plan = Planner().plan([make_transcript(10)], ["article"])
+        output = plan.print()
+        assert "Requests: 1" in output
+        assert "Estimated Cost: $" in output
+        assert "Estimated Wall Time: " in output
+
+
+class TestStageEstimate:
+    # Estimates add up field by field.
+    def test_add(self):
+        total = StageEstimate(1, 10, 5, 1.0, 1.0) + StageEstimate(2, 20, 10, 2.0, 2.0)
+        assert total == StageEstimate(3, 30, 15, 3.0, 3.0)
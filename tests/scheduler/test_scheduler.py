@@ -0,0 +1,117 @@
+import itertools
+import threading
+
+import pytest
+
+from src.scheduler import Scheduler
+
+
+def record(order):
+    """Returns a process function that records the chunks it processes."""
+    lock = threading.Lock()
+
+    def process(job, chunk):
+        with lock:
+            order.append((job.name, chunk))
+        return chunk.upper()
+
+    return process
+
+
+class TestScheduler:
+    # Shorter jobs are dispatched before longer ones.
+    def test_shortest_job_first(self):
+        scheduler = Scheduler(workers=1)
+        scheduler.submit("long", ["a", "b", "c"], costs=[1000, 1000, 1000])
+        scheduler.submit("short", ["x"], costs=[10])
+        order = []
+
+        finished = [job.name for job in scheduler.run(record(order))]
+
+        assert order[0] == ("short", "x")
+        assert finished[0] == "short"
+
+    # Higher priority jobs are dispatched before cheaper ones.
+    def test_priority(self):
+        scheduler = Scheduler(workers=1)
+        scheduler.submit("cheap", ["x"], costs=[100])
+        scheduler.submit("urgent", ["y"], costs=[1000], priority=4)
+        order = []
+
+        list(scheduler.run(record(order)))
+
+        assert order[0] == ("urgent", "y")
+
+    # Chunks of a job are interleaved with those of other jobs.
+    def test_chunks_are_interleaved(self, mocker):
+        # Time stands still until the first chunk is dispatched, then moves on.
+        mocker.patch(
+            "src.scheduler.time.monotonic",
+            side_effect=itertools.chain([0.0] * 3, itertools.repeat(3.0)),
+        )
+        scheduler = Scheduler(workers=1, aging=1.0)
+        scheduler.submit("first", ["a", "b"], costs=[1, 5])
+        scheduler.submit("second", ["x"], costs=[7])
+        order = []
+
+        list(scheduler.run(record(order)))
+
+        assert order == [("first", "a"), ("second", "x"), ("first", "b")]
+
+    # A large job is not starved by a stream of smaller jobs.
+    def test_aging_prevents_starvation(self, mocker):
+        clock = mocker.patch("src.scheduler.time.monotonic", return_value=0.0)
+        scheduler = Scheduler(workers=1, aging=0.001)
+        scheduler.submit("large", ["a"], costs=[5000])
+        clock.return_value = 10.0
+        scheduler.submit("late", ["x"], costs=[10])
+        order = []
+
+        list(scheduler.run(record(order)))
+
+        assert order[0] == ("large", "a")
+
+    # Results are stored per chunk and on_complete runs once per job.
+    def test_results_and_on_complete(self):
+        scheduler = Scheduler(workers=3)
+        job = scheduler.submit("job", ["a", "b", "c"])
+        completed = []
+
+        def on_complete(job):
+            completed.append(job.name)
+            job.results = "".join(job.results)
+
+        list(scheduler.run(record([]), on_complete=on_complete))
+
+        assert completed == ["job"]
+        assert job.results == "ABC"
+
+    # The report has queue wait and completion time percentiles.
+    def test_report(self):
+        scheduler = Scheduler(workers=2)
+        for i in range(5):
+            scheduler.submit(f"job{i}", ["a"] * (i + 1))
+        list(scheduler.run(record([])))
+
+        report = scheduler.report()
+
+        assert report.jobs == 5
+        assert set(report.queue_wait) == {"p50", "p90", "p99"}
+        assert report.completion_time["p50"] <= report.completion_time["p99"]
+        assert "Queue Wait" in report.print()
+
+    # Errors raised while processing a chunk are raised to the caller.
+    def test_error_is_raised(self):
+        scheduler = Scheduler()
+        scheduler.submit("job", ["a"])
+
+        def process(job, chunk):
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError, match="boom"):
+            list(scheduler.run(process))
+
+    # Raises a ValueError for a job without chunks.
+    def test_empty_job(self):
+        with pytest.raises(ValueError):
+            Scheduler().submit("job", [])
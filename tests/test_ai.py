@@ -149,7 +149,9 @@ class TestSummary:
                 url="https://www.youtube.com/watch?v=dQw4w9WgXcQ",
             ),
         )
-        mocker.patch.object(AI, "_split_transcript", return_value=["This is a chunk"])
+        mocker.patch.object(
+            AI, "_iter_transcript", return_value=iter(["This is a chunk"])
+        )
         mocker.patch.object(AI, "_chat", return_value=["Generated summary"])
 
         # Initialize the AI object
@@ -173,7 +175,9 @@ class TestSummary:
                 url="https://www.youtube.com/watch?v=dQw4w9WgXcQ",
             ),
         )
-        mocker.patch.object(AI, "_split_transcript", return_value=["This is a chunk"])
+        mocker.patch.object(
+            AI, "_iter_transcript", return_value=iter(["This is a chunk"])
+        )
         mocker.patch.object(AI, "_chat", return_value=["Generated summary"])
 
         # Initialize the AI object
@@ -197,7 +201,9 @@ class TestSummary:
                 url="https://www.youtube.com/watch?v=dQw4w9WgXcQ",
             ),
         )
-        mocker.patch.object(AI, "_split_transcript", return_value=["This is a chunk"])
+        mocker.patch.object(
+            AI, "_iter_transcript", return_value=iter(["This is a chunk"])
+        )
         mocker.patch.object(AI, "_chat", return_value=["Generated summary"])
 
         # Initialize the AI object
@@ -207,4 +213,4 @@ class TestSummary:
         ai.summary()
 
         # Assert that the text splitter is called
-        AI._split_transcript.assert_called_once()
+        AI._iter_transcript.assert_called_once()
@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+from src.transcript import Metadata, Transcript
+
+URL = "https://www.youtube.com/watch?v=abc"
+
+
+def make_transcript():
+    return Transcript(
+        content="Hello world",
+        metadata=Metadata(
+            title="Title", publish_date="2024-01-01", author="Author", url=URL
+        ),
+    )
+
+
+class TestCache:
+    # A saved transcript loads back unchanged.
+    def test_save_load(self, tmp_path):
+        path = str(tmp_path / "talk.transcript.json")
+        make_transcript().save(path)
+        assert Transcript.load(path) == make_transcript()
+        assert Transcript.from_file(path) == make_transcript()
+
+    # A cached transcript is only fetched once.
+    def test_get_transcript_cache_dir(self, tmp_path):
+        with patch("src.transcript.YoutubeLoader") as loader:
+            loader.from_youtube_url.return_value.load.return_value = [
+                type(
+                    "Document",
+                    (),
+                    {
+                        "page_content": "Hello world",
+                        "metadata": {
+                            "title": "Title",
+                            "publish_date": "2024-01-01 00:00:00",
+                            "author": "Author",
+                        },
+                    },
+                )
+            ]
+            first = Transcript.get_transcript(URL, cache_dir=str(tmp_path))
+            second = Transcript.get_transcript(URL, cache_dir=str(tmp_path))
+        assert first == second
+        assert loader.from_youtube_url.call_count == 1
+        assert len(list(tmp_path.iterdir())) == 1
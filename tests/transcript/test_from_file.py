@@ -0,0 +1,95 @@
+import json
+import os
+
+import pytest
+
+from src.transcript import Transcript
+
+
+class TestFromFile:
+    # A transcript is built from a local caption file without network access.
+    def test_from_srt(self, tmp_path):
+        path = tmp_path / "my-talk.srt"
+        path.write_text(
+            "1\n00:00:01,000 --> 00:00:02,000\nHello\n\n"
+            "2\n00:00:02,000 --> 00:00:03,000\nworld\n"
+        )
+        transcript = Transcript.from_file(str(path))
+        assert transcript.content == "Hello world"
+        assert transcript.metadata.title == "my-talk"
+        assert transcript.metadata.author == "Unknown"
+        assert transcript.metadata.url.startswith("file://")
+
+    # Metadata is read from a yt-dlp style .info.json file when present.
+    def test_metadata_from_info_json(self, tmp_path):
+        (tmp_path / "talk.json").write_text(json.dumps([{"text": "Hi"}]))
+        (tmp_path / "talk.info.json").write_text(
+            json.dumps(
+                {
+                    "title": "The Talk",
+                    "upload_date": "20240131",
+                    "uploader": "Speaker",
+                    "webpage_url": "https://www.youtube.com/watch?v=abc",
+                }
+            )
+        )
+        metadata = Transcript.from_file(str(tmp_path / "talk.json")).metadata
+        assert metadata.title == "The Talk"
+        assert metadata.publish_date == "2024-01-31"
+        assert metadata.author == "Speaker"
+        assert metadata.url == "https://www.youtube.com/watch?v=abc"
+
+    # The metadata of a yt-dlp subtitle file, named with its language, is
+    # read from the .info.json file of the video.
+    def test_metadata_from_info_json_with_language(self, tmp_path):
+        (tmp_path / "talk.en-US.json").write_text(json.dumps([{"text": "Hi"}]))
+        (tmp_path / "talk.info.json").write_text(
+            json.dumps({"title": "The Talk", "upload_date": "20240131"})
+        )
+        path = str(tmp_path / "talk.en-US.json")
+        metadata = Transcript.from_file(path).metadata
+        assert metadata.title == "The Talk"
+        assert metadata.publish_date == "2024-01-31"
+
+    # A caption file without any text raises an exception.
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "empty.vtt"
+        path.write_text("WEBVTT\n")
+        with pytest.raises(Exception, match="No transcript available"):
+            Transcript.from_file(str(path))
+
+    # Raises a ValueError for an unsupported file format.
+    def test_unsupported_format(self, tmp_path):
+        path = tmp_path / "notes.txt"
+        path.write_text("text")
+        with pytest.raises(ValueError):
+            Transcript.from_file(str(path))
+
+
+class TestFromFiles:
+    # Transcripts are built lazily for every caption file in a directory.
+    def test_directory(self, tmp_path):
+        for name in ["a", "b"]:
+            (tmp_path / f"{name}.json").write_text(json.dumps([{"text": name}]))
+        transcripts = Transcript.from_files(str(tmp_path))
+        assert [transcript.content for transcript in transcripts] == ["a", "b"]
+
+    # Raises a ValueError when no caption file matches.
+    def test_no_match(self, tmp_path):
+        with pytest.raises(ValueError):
+            list(Transcript.from_files(str(tmp_path / "*.srt")))
+
+    # Files that cannot be loaded are reported and skipped when on_error is
+    # given, so one bad file does not abort a batch.
+    def test_skips_bad_files(self, tmp_path):
+        (tmp_path / "a.srt").write_text("1\n00:00:01,000 --> 00:00:02,000\nHi\n")
+        (tmp_path / "b.vtt").write_text("WEBVTT\n")
+        (tmp_path / "c.json").write_text("{not json")
+        errors = []
+
+        transcripts = Transcript.from_files(
+            str(tmp_path), on_error=lambda path, error: errors.append(path)
+        )
+
+        assert [transcript.content for transcript in transcripts] == ["Hi"]
+        assert [os.path.basename(path) for path in errors] == ["b.vtt", "c.json"]